@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -14,6 +14,8 @@ class PipelineStatusResponse(BaseModel):
     duration_minutes: Optional[int] = None
 
 class PipelineRunResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     pipeline_id: str
     status: str
@@ -45,6 +47,8 @@ class AgentLogResponse(BaseModel):
     created_at: datetime
 
 class ArticleResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
     id: int
     original_title: str
     original_link: str
@@ -1,5 +1,6 @@
 import asyncio
-import json
+import contextvars
+import orjson
 import uuid
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
@@ -12,8 +13,8 @@ from langchain.schema import HumanMessage
 import os
 from database import (
     get_db_connection, log_agent_activity, create_pipeline_run, 
-    update_pipeline_status, update_pipeline_progress, save_article_to_db,
-    update_article_blockchain_info
+    update_pipeline_status, update_pipeline_progress, update_pipeline_tick, save_articles_bulk,
+    update_articles_blockchain_info_bulk
 )
 from blockchain_integration import integrate_blockchain_hashing
 
@@ -30,6 +31,8 @@ class NewsAgent:
         self.start_time = None
         self.current_cycle = 0
         self.total_articles_processed = 0
+        # Running pipeline task, set by the API when it starts one
+        self.task = None
         
         # News sources
         self.news_sources = [
@@ -52,7 +55,7 @@ class NewsAgent:
         
         # Send WebSocket update
         try:
-            await self.websocket_manager.broadcast(json.dumps(update))
+            await self.websocket_manager.broadcast(orjson.dumps(update).decode())
         except Exception as e:
             print(f"WebSocket broadcast error: {e}")
         
@@ -76,95 +79,103 @@ class NewsAgent:
         
         all_articles = []
         
-        for source_url in self.news_sources:
-            try:
-                await self.send_update("News Fetcher", f"Fetching from {source_url}")
+        # One session (and connection pool) for every article page in this fetch
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+            for source_url in self.news_sources:
+                try:
+                    await self.send_update("News Fetcher", f"Fetching from {source_url}")
                 
-                # Parse RSS feed
-                feed = feedparser.parse(source_url)
+                    # Parse RSS feed
+                    feed = feedparser.parse(source_url)
+                    source_articles = []
                 
-                for entry in feed.entries[:3]:  # Limit to 3 articles per source for demo
-                    # Extract image URL from RSS entry
-                    image_url = None
+                    for entry in feed.entries[:3]:  # Limit to 3 articles per source for demo
+                        # Extract image URL from RSS entry
+                        image_url = None
                     
-                    # Try different ways to get image URL from RSS
-                    if hasattr(entry, 'media_content') and entry.media_content:
-                        image_url = entry.media_content[0].get('url')
-                    elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
-                        image_url = entry.media_thumbnail[0].get('url')
-                    elif hasattr(entry, 'enclosures') and entry.enclosures:
-                        for enclosure in entry.enclosures:
-                            if enclosure.type and 'image' in enclosure.type:
-                                image_url = enclosure.href
-                                break
-                    
-                    article = {
-                        "title": entry.get("title", ""),
-                        "summary": entry.get("summary", ""),
-                        "link": entry.get("link", ""),
-                        "image_url": image_url,
-                        "published": entry.get("published", ""),
-                        "source": source_url,
-                        "content": ""
-                    }
+                        # Try different ways to get image URL from RSS
+                        if hasattr(entry, 'media_content') and entry.media_content:
+                            image_url = entry.media_content[0].get('url')
+                        elif hasattr(entry, 'media_thumbnail') and entry.media_thumbnail:
+                            image_url = entry.media_thumbnail[0].get('url')
+                        elif hasattr(entry, 'enclosures') and entry.enclosures:
+                            for enclosure in entry.enclosures:
+                                if enclosure.type and 'image' in enclosure.type:
+                                    image_url = enclosure.href
+                                    break
                     
-                    # Try to get full content and extract image if not found in RSS
-                    try:
-                        timeout = aiohttp.ClientTimeout(total=10)
-                        async with aiohttp.ClientSession(timeout=timeout) as session:
-                            async with session.get(article["link"]) as response:
-                                if response.status == 200:
-                                    html = await response.text()
-                                    soup = BeautifulSoup(html, 'html.parser')
-                                    
-                                    # Extract image URL if not found in RSS
-                                    if not image_url:
-                                        # Try to find Open Graph image
-                                        og_image = soup.find('meta', property='og:image')
-                                        if og_image and og_image.get('content'):
-                                            article["image_url"] = og_image.get('content')
-                                        else:
-                                            # Try to find Twitter card image
-                                            twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-                                            if twitter_image and twitter_image.get('content'):
-                                                article["image_url"] = twitter_image.get('content')
-                                            else:
-                                                # Try to find first img tag in content
-                                                first_img = soup.find('img')
-                                                if first_img and first_img.get('src'):
-                                                    src = first_img.get('src')
-                                                    # Make sure it's a full URL
-                                                    if src.startswith('//'):
-                                                        article["image_url"] = 'https:' + src
-                                                    elif src.startswith('/'):
-                                                        from urllib.parse import urljoin
-                                                        article["image_url"] = urljoin(article["link"], src)
-                                                    elif src.startswith('http'):
-                                                        article["image_url"] = src
-                                    
-                                    # Remove script and style elements
-                                    for script in soup(["script", "style"]):
-                                        script.decompose()
-                                    
-                                    # Get text content
-                                    text = soup.get_text()
-                                    lines = (line.strip() for line in text.splitlines())
-                                    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                                    article["content"] = ' '.join(chunk for chunk in chunks if chunk)[:2000]
-                    except Exception as e:
-                        await self.send_update("News Fetcher", f"Error fetching content for {article['title']}: {str(e)}")
-                        article["content"] = article["summary"]  # Fallback to summary
+                        article = {
+                            "title": entry.get("title", ""),
+                            "summary": entry.get("summary", ""),
+                            "link": entry.get("link", ""),
+                            "image_url": image_url,
+                            "published": entry.get("published", ""),
+                            "source": source_url,
+                            "content": ""
+                        }
                     
-                    all_articles.append(article)
+                        source_articles.append(article)
                 
-                await self.send_update("News Fetcher", f"Fetched {len(feed.entries[:3])} articles from {source_url}")
+                    # Get full content (and a fallback image) for every article at once
+                    async with asyncio.TaskGroup() as tg:
+                        for article in source_articles:
+                            tg.create_task(self._fetch_article_content(session, article))
+                    all_articles.extend(source_articles)
                 
-            except Exception as e:
-                await self.send_update("News Fetcher", f"Error fetching from {source_url}: {str(e)}")
+                    await self.send_update("News Fetcher", f"Fetched {len(feed.entries[:3])} articles from {source_url}")
+                
+                except Exception as e:
+                    await self.send_update("News Fetcher", f"Error fetching from {source_url}: {str(e)}")
         
         await self.send_update("News Fetcher", f"Total articles fetched: {len(all_articles)}", {"count": len(all_articles)})
         return all_articles
 
+    async def _fetch_article_content(self, session: aiohttp.ClientSession, article: Dict):
+        """Fill in an article's page text, and its image if the feed had none"""
+        try:
+            async with session.get(article["link"]) as response:
+                if response.status == 200:
+                    html = await response.text()
+                    soup = BeautifulSoup(html, 'html.parser')
+
+                    # Extract image URL if not found in RSS
+                    if not article["image_url"]:
+                        # Try to find Open Graph image
+                        og_image = soup.find('meta', property='og:image')
+                        if og_image and og_image.get('content'):
+                            article["image_url"] = og_image.get('content')
+                        else:
+                            # Try to find Twitter card image
+                            twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
+                            if twitter_image and twitter_image.get('content'):
+                                article["image_url"] = twitter_image.get('content')
+                            else:
+                                # Try to find first img tag in content
+                                first_img = soup.find('img')
+                                if first_img and first_img.get('src'):
+                                    src = first_img.get('src')
+                                    # Make sure it's a full URL
+                                    if src.startswith('//'):
+                                        article["image_url"] = 'https:' + src
+                                    elif src.startswith('/'):
+                                        from urllib.parse import urljoin
+                                        article["image_url"] = urljoin(article["link"], src)
+                                    elif src.startswith('http'):
+                                        article["image_url"] = src
+
+                    # Remove script and style elements
+                    for script in soup(["script", "style"]):
+                        script.decompose()
+
+                    # Get text content
+                    text = soup.get_text()
+                    lines = (line.strip() for line in text.splitlines())
+                    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+                    article["content"] = ' '.join(chunk for chunk in chunks if chunk)[:2000]
+        except Exception as e:
+            await self.send_update("News Fetcher", f"Error fetching content for {article['title']}: {str(e)}")
+            article["content"] = article["summary"]  # Fallback to summary
+
     async def check_authenticity(self, articles: List[Dict]) -> List[Dict]:
         """Agent 2: Check authenticity and find similar news"""
         await self.send_update("Authenticity Checker", "Starting authenticity verification...")
@@ -300,6 +311,7 @@ class NewsAgent:
         await self.send_update("Article Generator", "Starting article generation...")
         
         final_articles = []
+        generated = []
         
         for i, article in enumerate(articles):
             try:
@@ -333,42 +345,59 @@ class NewsAgent:
                     await self.send_update("Article Generator", f"LLM error: {str(llm_error)}")
                     generated_content = f"HEADLINE: {article['title']}\nLEAD: {article['content'][:200]}...\nBODY: Content generation failed\nTAGS: news, error"
                 
-                # Save to database using the database function (now includes image_url)
-                article_id = await save_article_to_db(
-                    pipeline_id=self.current_pipeline_id,
-                    original_title=article['title'],
-                    original_link=article['link'],
-                    image_url=article.get('image_url'),
-                    generated_content=generated_content,
-                    authenticity_score=article.get('authenticity_check', {}),
-                    source=article['source'],
-                    cycle_number=self.current_cycle
-                )
-                
-                # Create final article object
-                final_article = {
-                    "id": article_id,
-                    "original_title": article['title'],
-                    "original_link": article['link'],
-                    "image_url": article.get('image_url'),
-                    "generated_content": generated_content,
-                    "authenticity_score": article.get('authenticity_check', {}),
-                    "processed_at": datetime.now().isoformat(),
-                    "source": article['source'],
-                    "pipeline_id": self.current_pipeline_id,
-                    "cycle_number": self.current_cycle
-                }
-                
-                final_articles.append(final_article)
-                self.total_articles_processed += 1
-                
-                await self.send_update("Article Generator", 
-                                     f"Generated and saved: {article['title'][:50]}...", 
-                                     {"article_id": article_id, "has_image": bool(article.get('image_url'))})
+                generated.append((article, generated_content))
                 
             except Exception as e:
                 await self.send_update("Article Generator", f"Error generating article: {str(e)}")
         
+        # Save the whole batch in one round trip instead of one INSERT per article
+        rows = [
+            {
+                "original_title": article['title'],
+                "original_link": article['link'],
+                "image_url": article.get('image_url'),
+                "generated_content": generated_content,
+                "authenticity_score": article.get('authenticity_check', {}),
+                "source": article['source'],
+                "pipeline_id": self.current_pipeline_id,
+                "cycle_number": self.current_cycle
+            }
+            for article, generated_content in generated
+        ]
+        try:
+            saved = list(zip(generated, await save_articles_bulk(rows)))
+        except Exception as e:
+            # The batch is all-or-nothing, so retry row by row and lose only the bad articles
+            await self.send_update("Article Generator", f"Error saving article batch, retrying one by one: {str(e)}")
+            saved = []
+            for pair, row in zip(generated, rows):
+                try:
+                    saved.append((pair, (await save_articles_bulk([row]))[0]))
+                except Exception as row_error:
+                    await self.send_update("Article Generator", f"Error saving article {row['original_title'][:50]!r}: {str(row_error)}")
+        
+        for (article, generated_content), article_id in saved:
+            # Create final article object
+            final_article = {
+                "id": article_id,
+                "original_title": article['title'],
+                "original_link": article['link'],
+                "image_url": article.get('image_url'),
+                "generated_content": generated_content,
+                "authenticity_score": article.get('authenticity_check', {}),
+                "processed_at": datetime.now().isoformat(),
+                "source": article['source'],
+                "pipeline_id": self.current_pipeline_id,
+                "cycle_number": self.current_cycle
+            }
+            
+            final_articles.append(final_article)
+            self.total_articles_processed += 1
+            
+            await self.send_update("Article Generator", 
+                                 f"Generated and saved: {article['title'][:50]}...", 
+                                 {"article_id": article_id, "has_image": bool(article.get('image_url'))})
+        
         await self.send_update("Article Generator", f"Article generation completed. {len(final_articles)} articles saved to database")
         return final_articles
 
@@ -422,49 +451,51 @@ class NewsAgent:
                         self.websocket_manager
                     )
                     
-                    # Update each article in database with blockchain information
-                    blockchain_stored_count = 0
+                    # Collect blockchain information for every article that was hashed or stored
+                    blockchain_updates = []
                     for article in blockchain_articles:
                         if article.get('blockchain_hashes') or article.get('blockchain_stored'):
-                            try:
-                                blockchain_info = {
-                                    'stored_on_chain': article.get('blockchain_stored', False),
-                                    'transaction_hash': article.get('blockchain_transaction', {}).get('transaction_hash'),
-                                    'blockchain_article_id': article.get('blockchain_transaction', {}).get('article_id'),
-                                    'network': article.get('blockchain_network', 'bsc_testnet'),
-                                    'explorer_url': article.get('blockchain_transaction', {}).get('explorer_url'),
-                                    'content_hash': article.get('blockchain_hashes', {}).get('content_hash'),
-                                    'metadata_hash': article.get('blockchain_hashes', {}).get('metadata_hash')
+                            blockchain_updates.append((article.get('id'), {
+                                'stored_on_chain': article.get('blockchain_stored', False),
+                                'transaction_hash': article.get('blockchain_transaction', {}).get('transaction_hash'),
+                                'blockchain_article_id': article.get('blockchain_transaction', {}).get('article_id'),
+                                'network': article.get('blockchain_network', 'bsc_testnet'),
+                                'explorer_url': article.get('blockchain_transaction', {}).get('explorer_url'),
+                                'content_hash': article.get('blockchain_hashes', {}).get('content_hash'),
+                                'metadata_hash': article.get('blockchain_hashes', {}).get('metadata_hash')
+                            }))
+                    
+                    # Update all articles in database with blockchain info in one batch
+                    try:
+                        await update_articles_blockchain_info_bulk(blockchain_updates)
+                    except Exception as e:
+                        await log_agent_activity(
+                            self.current_pipeline_id,
+                            "Blockchain Storage",
+                            f"Error updating {len(blockchain_updates)} articles with blockchain info: {str(e)}",
+                            "ERROR"
+                        )
+                        blockchain_updates = []
+                    
+                    blockchain_stored_count = 0
+                    for article_id, blockchain_info in blockchain_updates:
+                        if blockchain_info.get('stored_on_chain'):
+                            blockchain_stored_count += 1
+                            
+                            # Log successful blockchain storage
+                            await log_agent_activity(
+                                self.current_pipeline_id,
+                                "Blockchain Storage",
+                                f"Article {article_id} stored on blockchain with TX: {(blockchain_info.get('transaction_hash') or '')[:10]}...",
+                                "INFO",
+                                {
+                                    "article_id": article_id,
+                                    "blockchain_article_id": blockchain_info.get('blockchain_article_id'),
+                                    "transaction_hash": blockchain_info.get('transaction_hash'),
+                                    "explorer_url": blockchain_info.get('explorer_url'),
+                                    "network": blockchain_info.get('network')
                                 }
-                                
-                                # Update article in database with blockchain info
-                                await update_article_blockchain_info(article.get('id'), blockchain_info)
-                                
-                                if blockchain_info.get('stored_on_chain'):
-                                    blockchain_stored_count += 1
-                                    
-                                    # Log successful blockchain storage
-                                    await log_agent_activity(
-                                        self.current_pipeline_id,
-                                        "Blockchain Storage",
-                                        f"Article {article.get('id')} stored on blockchain with TX: {blockchain_info.get('transaction_hash', '')[:10]}...",
-                                        "INFO",
-                                        {
-                                            "article_id": article.get('id'),
-                                            "blockchain_article_id": blockchain_info.get('blockchain_article_id'),
-                                            "transaction_hash": blockchain_info.get('transaction_hash'),
-                                            "explorer_url": blockchain_info.get('explorer_url'),
-                                            "network": blockchain_info.get('network')
-                                        }
-                                    )
-                                
-                            except Exception as e:
-                                await log_agent_activity(
-                                    self.current_pipeline_id,
-                                    "Blockchain Storage",
-                                    f"Error updating article {article.get('id')} with blockchain info: {str(e)}",
-                                    "ERROR"
-                                )
+                            )
                     
                     # Update progress
                     try:
@@ -495,7 +526,8 @@ class NewsAgent:
                     break  # Time is up
             
             # Pipeline completed
-            await update_pipeline_status(self.current_pipeline_id, "COMPLETED")
+            await update_pipeline_tick(self.current_pipeline_id, "COMPLETED",
+                                       self.current_cycle, self.total_articles_processed)
             await self.send_update("Pipeline", f"News processing pipeline completed successfully! Processed {self.total_articles_processed} articles in {self.current_cycle} cycles.", {
                 "status": "COMPLETED",
                 "total_articles": self.total_articles_processed,
@@ -503,8 +535,15 @@ class NewsAgent:
                 "duration": str(datetime.now() - self.start_time)
             })
             
+        except asyncio.CancelledError:
+            # Cancelled at app shutdown: close the run out instead of leaving it RUNNING
+            await update_pipeline_tick(self.current_pipeline_id, "STOPPED",
+                                       self.current_cycle, self.total_articles_processed,
+                                       "Pipeline cancelled at shutdown")
+            raise
         except Exception as e:
-            await update_pipeline_status(self.current_pipeline_id, "ERROR", str(e))
+            await update_pipeline_tick(self.current_pipeline_id, "ERROR",
+                                       self.current_cycle, self.total_articles_processed, str(e))
             await self.send_update("Pipeline", f"Pipeline error: {str(e)}", {"status": "ERROR", "error": str(e)})
             await log_agent_activity(
                 self.current_pipeline_id,
@@ -521,14 +560,18 @@ class NewsAgent:
         """Stop the running pipeline"""
         if self.is_running and self.current_pipeline_id:
             self.is_running = False
-            # Update database status will be handled by the main loop
-            asyncio.create_task(self._stop_pipeline_cleanup())
+            # Empty context: called from a request, whose db_scope connection is back
+            # in the pool by the time this task queries
+            asyncio.get_running_loop().create_task(self._stop_pipeline_cleanup(), context=contextvars.Context())
 
     async def _stop_pipeline_cleanup(self):
         """Cleanup after stopping pipeline"""
         if self.current_pipeline_id:
-            await update_pipeline_status(self.current_pipeline_id, "STOPPED")
-            await self.send_update("Pipeline", "Pipeline stopped by user", {"status": "STOPPED"})
+            try:
+                await update_pipeline_status(self.current_pipeline_id, "STOPPED")
+                await self.send_update("Pipeline", "Pipeline stopped by user", {"status": "STOPPED"})
+            except Exception as e:
+                print(f"Error marking pipeline {self.current_pipeline_id} stopped: {e}")
 
     def get_status(self):
         """Get current pipeline status"""
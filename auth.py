@@ -4,17 +4,55 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+import asyncio
+import base64
+import calendar
+import hashlib
+import hmac
+import orjson
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import secrets
+import weakref
+from cachetools import TTLCache
 from schemas import User, TokenData
 from database import get_user_by_email as db_get_user_by_email
+from database import update_user_password_hash as db_update_user_password_hash
 
 # Configuration
 SECRET_KEY = "AIC_NEWS_SUPER_SECRET_KEY_2025" 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 3000000
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# HS256 signing state built once: the keyed HMAC is copied per token, and the
+# header segment never changes
+_JWT_HMAC = hmac.new(SECRET_KEY.encode(), digestmod=hashlib.sha256)
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+_JWT_HEADER_SEGMENT = _b64url(orjson.dumps({"alg": ALGORITHM, "typ": "JWT"}))
+
+# In-flight password verifies keyed by a digest of (password, stored hash); a
+# finished one stays for a second so bursts of identical logins share one verify
+_LOGIN_DEDUP_TTL = 1.0
+_inflight: dict = {}
+
+# Resolved users by token digest, so repeat requests skip the JWT verify and the
+# users lookup; per-key locks keep a cold token to one resolve at a time
+_token_user_cache = TTLCache(maxsize=10_000, ttl=30)
+_token_locks: "weakref.WeakValueDictionary[bytes, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Password hashing: new hashes are argon2id (OWASP parameters, 4 lanes per hash);
+# bcrypt stays verifiable and is rehashed to argon2 on the next successful login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=19456,
+    argon2__parallelism=4
+)
 security = HTTPBearer()
 
 # Utility functions
@@ -24,25 +62,59 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password, hashed_password):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+# Runs password hashing and verification off the event loop: a process pool when
+# this is the only worker so hashes use the other cores, threads (the hash
+# libraries release the GIL) when uvicorn already runs a process per core
+password_executor = None
+
+def start_password_executor():
+    """Create the password executor; called from the app lifespan"""
+    global password_executor
+    if int(os.getenv("WEB_CONCURRENCY", "1")) == 1:
+        password_executor = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+    else:
+        password_executor = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="password")
+
+def shutdown_password_executor():
+    """Stop the password executor without waiting for queued hashes"""
+    global password_executor
+    if password_executor is not None:
+        password_executor.shutdown(wait=False, cancel_futures=True)
+        password_executor = None
+
+async def hash_password(password: str) -> str:
+    """Hash a password in the password executor"""
+    return await asyncio.get_running_loop().run_in_executor(password_executor, get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode.update({"exp": calendar.timegm(expire.utctimetuple())})
+    signing_input = _JWT_HEADER_SEGMENT + b"." + _b64url(orjson.dumps(to_encode))
+    signer = _JWT_HMAC.copy()
+    signer.update(signing_input)
+    return (signing_input + b"." + _b64url(signer.digest())).decode()
 
 async def get_user_by_email(email: str):
     return await db_get_user_by_email(email)
 
 async def authenticate_user(email: str, password: str):
+    # Looked up in the caller's context, so a request's db_scope connection is used
+    # and no request ever waits on a second pool connection
     user_record = await get_user_by_email(email)
     if not user_record:
         return False
-    if not verify_password(password, user_record['hashed_password']):
+    verified, upgraded_hash = await _verify_password_shared(password, user_record['hashed_password'])
+    if not verified:
         return False
+    if upgraded_hash:
+        await db_update_user_password_hash(user_record['id'], user_record['email'], upgraded_hash)
     return User(
         id=user_record['id'],
         email=user_record['email'],
@@ -53,20 +125,57 @@ async def authenticate_user(email: str, password: str):
         created_at=user_record['created_at']
     )
 
+async def _verify_password_shared(password: str, hashed_password: str):
+    """verify_and_update_password in the password executor, shared by identical concurrent attempts"""
+    key = hashlib.blake2b(password.encode() + b":" + hashed_password.encode(), digest_size=16).digest()
+    attempt = _inflight.get(key)
+    if attempt is None:
+        attempt = asyncio.get_running_loop().run_in_executor(
+            password_executor, verify_and_update_password, password, hashed_password
+        )
+        _inflight[key] = attempt
+        attempt.add_done_callback(
+            lambda done: done.get_loop().call_later(_LOGIN_DEDUP_TTL, _inflight.pop, key, None)
+        )
+    # Shielded so one client disconnecting doesn't cancel the verify for the others
+    return await asyncio.shield(attempt)
+
 async def authenticate_admin(email: str, password: str):
     user = await authenticate_user(email, password)
     if not user or not user.is_admin:
         return False
     return user
 
+def invalidate_cached_user(user_id: int):
+    """Drop every cached token that resolves to this user"""
+    for key, user in list(_token_user_cache.items()):
+        if user.id == user_id:
+            _token_user_cache.pop(key, None)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    token = credentials.credentials
+    key = hashlib.sha256(token.encode()).digest()[:16]
+    user = _token_user_cache.get(key)
+    if user is not None:
+        return user
+    
+    lock = _token_locks.get(key)
+    if lock is None:
+        lock = _token_locks[key] = asyncio.Lock()
+    async with lock:
+        user = _token_user_cache.get(key)
+        if user is None:
+            user = await _resolve_token_user(token)
+            _token_user_cache[key] = user
+    return user
+
+async def _resolve_token_user(token: str):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
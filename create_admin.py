@@ -20,6 +20,9 @@ async def create_first_admin():
             hashed_password=hashed_password,
             is_admin=True
         )
+        if admin_user is None:
+            print(f"Error creating admin user: {email} is already registered")
+            return
         print(f"Admin user created successfully!")
         print(f"Email: {email}")
         print(f"Password: {password}")
@@ -1,278 +1,841 @@
-import json
+import asyncio
+import orjson
+import re
 from typing import Optional, List
 from contextlib import asynccontextmanager
-from datetime import datetime, timezone
+from contextvars import ContextVar
+from functools import lru_cache
+from datetime import date, datetime
 import asyncpg
+from cachetools import TTLCache
 import os
+import ssl
+import time
 
-# Database configuration
+# One TLS context shared by every pool connection instead of one built per connect.
+# Matches asyncpg's ssl="require": encrypted, without certificate verification.
+_SSL_CONTEXT = ssl.create_default_context()
+_SSL_CONTEXT.check_hostname = False
+_SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+
+# Database configuration (credentials must come from the environment). A PGHOST
+# starting with "/" is a Unix socket directory for a colocated Postgres, which
+# skips the TCP stack and needs no TLS.
+_PGHOST = os.getenv("PGHOST", "aic-db1.postgres.database.azure.com")
 DATABASE_CONFIG = {
-    "host": os.getenv("PGHOST", "aic-db1.postgres.database.azure.com"),
-    "user": os.getenv("PGUSER", "isxuuohzgi"),
+    "host": _PGHOST,
+    "user": os.getenv("PGUSER"),
     "port": int(os.getenv("PGPORT", "5432")),
     "database": os.getenv("PGDATABASE", "postgres"),
-    "password": os.getenv("PGPASSWORD", "UKgMzRirfe2ajm9iJhgFNZ58kX"),
-    "ssl": "require"
+    "password": os.getenv("PGPASSWORD"),
+    "ssl": None if _PGHOST.startswith("/") else _SSL_CONTEXT
 }
 
+# Set PGBOUNCER=1 when the pool points at a PgBouncer running in transaction mode
+# (pool_mode=transaction), e.g. PGHOST=pgbouncer PGPORT=6432. That is the setup for
+# running several uvicorn workers without exhausting Postgres' max_connections.
+USE_PGBOUNCER = os.getenv("PGBOUNCER") == "1"
+
+# agent_logs partition retention (whole months kept before the current one)
+AGENT_LOG_RETENTION_MONTHS = int(os.getenv("AGENT_LOG_RETENTION_MONTHS", "3"))
+AGENT_LOG_PARTITIONS_AHEAD = 1
+
+# init_database skips _SCHEMA_DDL once schema_version records this version. Every
+# change to _SCHEMA_DDL must bump it, or existing deployments never apply the
+# change. agent_logs partitions are not gated by it; they are checked on every start.
+_SCHEMA_VERSION = 1
+_SCHEMA_INIT_LOCK_ID = 727_001
+
+# Whole schema, sent as one multi-statement simple query by init_database
+_SCHEMA_DDL = """
+-- Create users table
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    full_name VARCHAR(255) NOT NULL,
+    hashed_password VARCHAR(255) NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    is_admin BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create articles table with blockchain fields and image_url
+CREATE TABLE IF NOT EXISTS articles (
+    id SERIAL PRIMARY KEY,
+    original_title TEXT NOT NULL,
+    original_link TEXT,
+    image_url TEXT,
+    generated_content TEXT NOT NULL,
+    authenticity_score JSONB,
+    source TEXT,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    pipeline_id VARCHAR(255),
+    cycle_number INTEGER DEFAULT 1,
+    blockchain_stored BOOLEAN DEFAULT FALSE,
+    blockchain_transaction_hash VARCHAR(255),
+    blockchain_article_id INTEGER,
+    blockchain_network VARCHAR(50) DEFAULT 'bsc_testnet',
+    blockchain_explorer_url TEXT,
+    content_hash VARCHAR(255),
+    metadata_hash VARCHAR(255)
+);
+
+-- Create pipeline_runs table
+CREATE TABLE IF NOT EXISTS pipeline_runs (
+    id SERIAL PRIMARY KEY,
+    pipeline_id VARCHAR(255) UNIQUE NOT NULL,
+    status VARCHAR(50) NOT NULL DEFAULT 'RUNNING',
+    current_cycle INTEGER DEFAULT 0,
+    total_cycles INTEGER DEFAULT 1,
+    articles_processed INTEGER DEFAULT 0,
+    error_message TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    ended_at TIMESTAMP,
+    duration_minutes INTEGER DEFAULT 30
+);
+
+-- Create agent_logs table for detailed logging, partitioned by month so old
+-- logs can be dropped as whole partitions instead of DELETEd row by row
+CREATE TABLE IF NOT EXISTS agent_logs (
+    id SERIAL,
+    pipeline_id VARCHAR(255),
+    agent_name VARCHAR(100) NOT NULL,
+    message TEXT NOT NULL,
+    log_level VARCHAR(20) DEFAULT 'INFO',
+    data JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Let each dashboard sub-count run as an index-only scan
+CREATE INDEX IF NOT EXISTS idx_articles_blockchain_created_at
+ON articles (created_at) WHERE blockchain_stored;
+
+-- Full-text search over title and body, kept current by Postgres itself
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_tsv tsvector
+GENERATED ALWAYS AS (
+    to_tsvector('english', coalesce(original_title, '') || ' ' || coalesce(generated_content, ''))
+) STORED;
+CREATE INDEX IF NOT EXISTS idx_articles_search_tsv
+ON articles USING GIN (search_tsv);
+
+-- Indexes for the list endpoints' filters and created_at DESC ordering
+CREATE INDEX IF NOT EXISTS idx_articles_created_desc
+ON articles (created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_articles_pipeline_created
+ON articles (pipeline_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_pipeline_runs_running
+ON pipeline_runs (created_at DESC) WHERE status = 'RUNNING';
+CREATE INDEX IF NOT EXISTS idx_agent_logs_pipeline_created
+ON agent_logs (pipeline_id, created_at DESC);
+
+-- Normalize the low-cardinality source names into a lookup table
+CREATE TABLE IF NOT EXISTS sources (
+    id SERIAL PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+INSERT INTO sources (name)
+SELECT DISTINCT source FROM articles WHERE source IS NOT NULL
+ON CONFLICT (name) DO NOTHING;
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS source_id INTEGER REFERENCES sources(id);
+UPDATE articles SET source_id = sources.id
+FROM sources
+WHERE sources.name = articles.source AND articles.source_id IS NULL;
+CREATE INDEX IF NOT EXISTS idx_articles_source_created
+ON articles (source_id, created_at DESC);
+
+-- Newest-first log tail when /admin/pipeline/logs has no pipeline filter
+CREATE INDEX IF NOT EXISTS idx_agent_logs_created
+ON agent_logs (created_at DESC);
+
+-- Versions of this DDL applied so far (see _SCHEMA_VERSION)
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
 # Connection pool
 connection_pool: Optional[asyncpg.Pool] = None
 
+# Agent log rows waiting to be COPYed into agent_logs by _flush_agent_logs
+# created_at is left to the column DEFAULT, so rows are stamped by the same server
+# clock that bounds the monthly partitions
+_AGENT_LOG_COLUMNS = ("pipeline_id", "agent_name", "message", "log_level", "data")
+_AGENT_LOG_BATCH_SIZE = 500
+_agent_log_queue: asyncio.Queue = asyncio.Queue(maxsize=10000)
+_agent_log_flusher: Optional[asyncio.Task] = None
+
+# Dashboard counts are served from here for a couple of seconds, and expired
+# early by the article_inserted notification
+DASHBOARD_STATS_TTL = 2.0
+_dashboard_stats_cache = {"ts": 0.0, "data": None}
+
+# get_user_by_email results by email, including None for unknown emails; entries
+# are dropped whenever this process creates or updates that user
+_user_cache = TTLCache(maxsize=10_000, ttl=30)
+_USER_CACHE_MISS = object()
+
+# Connection checked out by db_scope for the current request; helpers reuse it
+_req_conn: ContextVar[Optional[asyncpg.Connection]] = ContextVar("_req_conn", default=None)
+
+# SQL statements used by the data-access helpers below
+_SQL_CREATE_USER = """
+    INSERT INTO users (email, full_name, hashed_password, is_admin)
+    VALUES ($1, $2, $3, $4)
+    ON CONFLICT (email) DO NOTHING
+    RETURNING id, email, full_name, is_active, is_admin, created_at
+"""
+_SQL_GET_USER_BY_EMAIL = """
+    SELECT id, email, full_name, hashed_password, is_active, is_admin, created_at
+    FROM users WHERE email = $1
+"""
+_SQL_GET_USER_BY_ID = """
+    SELECT id, email, full_name, hashed_password, is_active, is_admin, created_at
+    FROM users WHERE id = $1
+"""
+_SQL_UPDATE_USER_ACTIVITY = """
+    UPDATE users SET is_active = $1 WHERE email = $2
+"""
+_SQL_UPDATE_USER_PASSWORD_HASH = """
+    UPDATE users SET hashed_password = $1 WHERE id = $2
+"""
+_SQL_TOGGLE_USER_ACTIVITY = """
+    UPDATE users SET is_active = NOT is_active WHERE id = $1
+    RETURNING email, is_active
+"""
+_SQL_GET_ALL_USERS = """
+    SELECT id, email, full_name, is_active, is_admin, created_at
+    FROM users ORDER BY created_at DESC
+"""
+# The admin user list serialized by Postgres, same fields and order as _SQL_GET_ALL_USERS
+_SQL_GET_ALL_USERS_JSON = """
+    SELECT COALESCE(
+        json_agg(json_build_object(
+            'id', id, 'email', email, 'full_name', full_name,
+            'is_active', is_active, 'is_admin', is_admin, 'created_at', created_at
+        ) ORDER BY created_at DESC),
+        '[]'::json
+    )::text
+    FROM users
+"""
+_SQL_CREATE_PIPELINE_RUN = """
+    INSERT INTO pipeline_runs (pipeline_id, status, duration_minutes, started_at)
+    VALUES ($1, 'RUNNING', $2, CURRENT_TIMESTAMP)
+    RETURNING id
+"""
+# NULL arguments leave the corresponding column unchanged
+_SQL_UPDATE_PIPELINE_TICK = """
+    UPDATE pipeline_runs 
+    SET status = COALESCE($2, status),
+        current_cycle = COALESCE($3, current_cycle),
+        articles_processed = COALESCE($4, articles_processed),
+        error_message = COALESCE($5, error_message),
+        ended_at = CASE WHEN $2 IN ('COMPLETED', 'STOPPED', 'ERROR') THEN CURRENT_TIMESTAMP ELSE ended_at END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE pipeline_id = $1
+"""
+_SQL_GET_PIPELINE_RUN = """
+    SELECT id, pipeline_id, status, current_cycle, total_cycles, 
+           articles_processed, error_message, created_at, updated_at, 
+           started_at, ended_at, duration_minutes
+    FROM pipeline_runs WHERE pipeline_id = $1
+"""
+_SQL_GET_ACTIVE_PIPELINE_RUNS = """
+    SELECT id, pipeline_id, status, current_cycle, total_cycles, 
+           articles_processed, created_at, updated_at, started_at, duration_minutes
+    FROM pipeline_runs 
+    WHERE status = 'RUNNING'
+    ORDER BY created_at DESC
+"""
+_ARTICLE_INSERT_COLUMNS = (
+    "original_title", "original_link", "image_url", "generated_content",
+    "authenticity_score", "source", "pipeline_id", "cycle_number"
+)
+# Rows per multi-row INSERT; keeps the bind message well within protocol limits
+_ARTICLE_INSERT_CHUNK_SIZE = 100
+_SQL_UPSERT_SOURCES = """
+    INSERT INTO sources (name)
+    SELECT DISTINCT name FROM unnest($1::text[]) AS name WHERE name IS NOT NULL
+    ON CONFLICT (name) DO NOTHING
+"""
+_SQL_UPDATE_ARTICLE_BLOCKCHAIN_INFO = """
+    UPDATE articles 
+    SET blockchain_stored = $2,
+        blockchain_transaction_hash = $3,
+        blockchain_article_id = $4,
+        blockchain_network = $5,
+        blockchain_explorer_url = $6,
+        content_hash = $7,
+        metadata_hash = $8
+    WHERE id = $1
+"""
+_ARTICLE_COLUMNS = """
+    id, original_title, original_link, image_url, generated_content, 
+    COALESCE(authenticity_score, '{}'::jsonb) AS authenticity_score, source, processed_at, created_at, pipeline_id, cycle_number,
+    blockchain_stored, blockchain_transaction_hash, blockchain_article_id,
+    blockchain_network, blockchain_explorer_url, content_hash, metadata_hash
+"""
+_SQL_GET_ARTICLES_BY_PIPELINE = f"""
+    SELECT {_ARTICLE_COLUMNS}
+    FROM articles 
+    WHERE pipeline_id = $1
+    ORDER BY created_at DESC 
+    LIMIT $2
+"""
+_SQL_GET_ARTICLES = f"""
+    SELECT {_ARTICLE_COLUMNS}
+    FROM articles 
+    ORDER BY created_at DESC 
+    LIMIT $1
+"""
+_SQL_GET_DASHBOARD_STATS = """
+    SELECT
+        -- Planner estimate from the catalog instead of an O(N) count; a table that
+        -- has never been vacuumed or analyzed reports -1, so count it exactly then
+        (SELECT CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint
+                     ELSE (SELECT COUNT(*) FROM articles) END
+         FROM pg_class c WHERE c.oid = 'public.articles'::regclass) AS total_articles,
+        (SELECT COUNT(*) FROM articles WHERE created_at >= CURRENT_DATE) AS articles_today,
+        (SELECT COUNT(*) FROM articles WHERE blockchain_stored) AS blockchain_articles,
+        (SELECT COUNT(*) FROM pipeline_runs WHERE status = 'RUNNING') AS running_pipelines
+"""
+_SQL_SEARCH_ARTICLES = """
+    SELECT id, original_title, image_url, generated_content, source, created_at,
+           blockchain_stored, blockchain_explorer_url, blockchain_transaction_hash,
+           ts_rank(search_tsv, query) AS relevance_score
+    FROM articles, to_tsquery('english', $1) AS query
+    WHERE search_tsv @@ query
+    ORDER BY relevance_score DESC
+    LIMIT $2
+"""
+# Top tags from the "TAGS: a, b, c" line of the latest 100 articles (30 days), with
+# how many articles were looked at; a tag must appear more than once to count
+_SQL_GET_POPULAR_TAGS = """
+    WITH recent AS (
+        SELECT generated_content
+        FROM articles
+        WHERE created_at >= NOW() - INTERVAL '30 days'
+        ORDER BY created_at DESC
+        LIMIT 100
+    ), tags AS (
+        SELECT lower(btrim(tag, E' \\t\\r')) AS tag
+        FROM recent,
+             LATERAL regexp_match(generated_content, '^[ \\t]*TAGS:(.*)$', 'n') AS m,
+             LATERAL unnest(string_to_array(m[1], ',')) AS tag
+    ), top AS (
+        SELECT tag, COUNT(*) AS n
+        FROM tags
+        WHERE tag <> ''
+        GROUP BY tag
+        ORDER BY n DESC
+        LIMIT 20
+    )
+    SELECT (SELECT COUNT(*) FROM recent) AS articles_analyzed,
+           COALESCE((SELECT array_agg(tag ORDER BY n DESC) FROM top WHERE n > 1), '{}') AS tags
+"""
+# Word characters only, so user input can never inject tsquery operators
+_TSQUERY_TOKEN = re.compile(r"\w+")
+
+# Hot statements prepared once per pooled connection, looked up by name via _stmt()
+STATEMENTS = {
+    "create_user": _SQL_CREATE_USER,
+    "get_user_by_email": _SQL_GET_USER_BY_EMAIL,
+    "get_user_by_id": _SQL_GET_USER_BY_ID,
+    "update_user_activity": _SQL_UPDATE_USER_ACTIVITY,
+    "update_user_password_hash": _SQL_UPDATE_USER_PASSWORD_HASH,
+    "toggle_user_activity": _SQL_TOGGLE_USER_ACTIVITY,
+    "get_all_users": _SQL_GET_ALL_USERS,
+    "get_all_users_json": _SQL_GET_ALL_USERS_JSON,
+    "create_pipeline_run": _SQL_CREATE_PIPELINE_RUN,
+    "update_pipeline_tick": _SQL_UPDATE_PIPELINE_TICK,
+    "get_pipeline_run": _SQL_GET_PIPELINE_RUN,
+    "get_active_pipeline_runs": _SQL_GET_ACTIVE_PIPELINE_RUNS,
+    "upsert_sources": _SQL_UPSERT_SOURCES,
+    "update_article_blockchain_info": _SQL_UPDATE_ARTICLE_BLOCKCHAIN_INFO,
+    "get_articles_by_pipeline": _SQL_GET_ARTICLES_BY_PIPELINE,
+    "get_articles": _SQL_GET_ARTICLES,
+    "get_dashboard_stats": _SQL_GET_DASHBOARD_STATS,
+    "search_articles": _SQL_SEARCH_ARTICLES,
+    "get_popular_tags": _SQL_GET_POPULAR_TAGS,
+}
+
+class ArticleRow(asyncpg.Record):
+    """Record type for article rows"""
+    __slots__ = ()
+
+# Statements whose rows are decoded straight into ArticleRow
+_ARTICLE_ROW_STATEMENTS = frozenset({"get_articles_by_pipeline", "get_articles", "search_articles"})
+
+def _record_class(name: str):
+    return ArticleRow if name in _ARTICLE_ROW_STATEMENTS else asyncpg.Record
+
+class _Connection(asyncpg.Connection):
+    """Pool connection that keeps its prepared statements for its whole lifetime"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._prepared = {}
+
+class _UnpreparedStatement:
+    """Stand-in for a prepared statement when PgBouncer cannot keep one"""
+
+    def __init__(self, conn, query: str, record_class=asyncpg.Record):
+        self._conn = conn
+        self._query = query
+        self._record_class = record_class
+
+    async def fetch(self, *args):
+        return await self._conn.fetch(self._query, *args, record_class=self._record_class)
+
+    async def fetchrow(self, *args):
+        return await self._conn.fetchrow(self._query, *args, record_class=self._record_class)
+
+    async def fetchval(self, *args):
+        return await self._conn.fetchval(self._query, *args)
+
+    async def executemany(self, args):
+        return await self._conn.executemany(self._query, args)
+
+    def cursor(self, *args, prefetch=None):
+        return self._conn.cursor(self._query, *args, prefetch=prefetch, record_class=self._record_class)
+
+def _encode_jsonb(value) -> bytes:
+    # Binary jsonb is a version byte followed by the JSON text
+    return b"\x01" + orjson.dumps(value)
+
+def _decode_jsonb(data: bytes):
+    return orjson.loads(data[1:])
+
+async def _init_connection(conn):
+    """Register JSON codecs and prepare every statement in STATEMENTS on a new connection"""
+    # Codecs go first so the prepared statements pick them up
+    await conn.set_type_codec("jsonb", encoder=_encode_jsonb, decoder=_decode_jsonb,
+                              schema="pg_catalog", format="binary")
+    await conn.set_type_codec("json", encoder=orjson.dumps, decoder=orjson.loads,
+                              schema="pg_catalog", format="binary")
+    if USE_PGBOUNCER:
+        return
+    try:
+        for name, query in STATEMENTS.items():
+            conn._prepared[name] = await conn.prepare(query, record_class=_record_class(name))
+    except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+        # init_database has not created or migrated the schema yet, so
+        # leave the statements to be prepared on first use instead
+        conn._prepared.clear()
+
+async def _stmt(conn, name: str):
+    """Return the statement prepared on conn for the given STATEMENTS name"""
+    if USE_PGBOUNCER:
+        return _UnpreparedStatement(conn, STATEMENTS[name], _record_class(name))
+    statement = conn._prepared.get(name)
+    if statement is None:
+        statement = conn._prepared[name] = await conn.prepare(STATEMENTS[name], record_class=_record_class(name))
+    return statement
+
 async def create_connection_pool():
     """Create database connection pool"""
     global connection_pool
+    missing = [name for name, key in (("PGUSER", "user"), ("PGPASSWORD", "password"))
+               if not DATABASE_CONFIG[key]]
+    if missing:
+        raise RuntimeError(f"Missing database environment variables: {', '.join(missing)}")
+
+    if USE_PGBOUNCER:
+        # Transaction pooling does not keep prepared statements across transactions,
+        # and PgBouncer does the backend-side pooling for us, so each worker only
+        # needs a handful of client connections
+        pool_options = {"min_size": 2, "max_size": 5, "statement_cache_size": 0}
+    else:
+        # Enough warm connections to absorb bursts without a handshake storm, and a
+        # statement cache that never evicts or expires the dynamic article queries
+        pool_options = {
+            "min_size": 10,
+            "max_size": 50,
+            "statement_cache_size": 1024,
+            "max_cached_statement_lifetime": 0
+        }
+
+    # Sent as startup parameters, so they cost no extra round trip per connection.
+    # JIT compilation only adds latency to these short OLTP queries; PgBouncer
+    # rejects it as a startup parameter, so it is left to the server config there.
+    server_settings = {"application_name": "aic-api"}
+    if not USE_PGBOUNCER:
+        server_settings["jit"] = "off"
+
     connection_pool = await asyncpg.create_pool(
         **DATABASE_CONFIG,
-        min_size=5,
-        max_size=20
+        **pool_options,
+        server_settings=server_settings,
+        max_inactive_connection_lifetime=300,
+        command_timeout=30,
+        connection_class=_Connection,
+        init=_init_connection
     )
+    global _agent_log_flusher
+    if _agent_log_flusher is None:
+        _agent_log_flusher = asyncio.create_task(_flush_agent_logs())
     return connection_pool
 
 async def close_connection_pool():
     """Close database connection pool"""
-    global connection_pool
+    global connection_pool, _agent_log_flusher
+    if _agent_log_flusher:
+        _agent_log_flusher.cancel()
+        await asyncio.gather(_agent_log_flusher, return_exceptions=True)
+        _agent_log_flusher = None
     if connection_pool:
+        # Write whatever was queued after the flusher's last batch
+        try:
+            while not _agent_log_queue.empty():
+                await _write_agent_logs(_drain_agent_log_queue([]))
+        except Exception as e:
+            print(f"Error writing agent logs on shutdown: {e}")
         await connection_pool.close()
+        connection_pool = None
+
+def _require_pool() -> asyncpg.Pool:
+    """Return the pool opened by create_connection_pool at startup"""
+    if connection_pool is None:
+        raise RuntimeError("pool not initialized")
+    return connection_pool
 
 @asynccontextmanager
 async def get_db_connection():
-    """Get database connection from pool"""
-    if not connection_pool:
-        await create_connection_pool()
+    """Get database connection, reusing the current request's one if db_scope holds it"""
+    connection = _req_conn.get()
+    if connection is not None:
+        yield connection
+        return
     
-    async with connection_pool.acquire() as connection:
+    async with _require_pool().acquire() as connection:
         yield connection
 
+async def db_scope():
+    """FastAPI dependency that holds one pooled connection for the whole request"""
+    async with _require_pool().acquire() as connection:
+        token = _req_conn.set(connection)
+        try:
+            yield
+        finally:
+            _req_conn.reset(token)
+
+async def _applied_schema_version(conn) -> int:
+    """Newest schema version recorded in the database, 0 before the first one"""
+    if await conn.fetchval("SELECT to_regclass('public.schema_version')") is None:
+        return 0
+    return await conn.fetchval("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+
 async def init_database():
     """Initialize database tables"""
     async with get_db_connection() as conn:
-        # Create users table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                full_name VARCHAR(255) NOT NULL,
-                hashed_password VARCHAR(255) NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                is_admin BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create articles table with blockchain fields and image_url
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS articles (
-                id SERIAL PRIMARY KEY,
-                original_title TEXT NOT NULL,
-                original_link TEXT,
-                image_url TEXT,
-                generated_content TEXT NOT NULL,
-                authenticity_score JSONB,
-                source TEXT,
-                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                pipeline_id VARCHAR(255),
-                cycle_number INTEGER DEFAULT 1,
-                blockchain_stored BOOLEAN DEFAULT FALSE,
-                blockchain_transaction_hash VARCHAR(255),
-                blockchain_article_id INTEGER,
-                blockchain_network VARCHAR(50) DEFAULT 'bsc_testnet',
-                blockchain_explorer_url TEXT,
-                content_hash VARCHAR(255),
-                metadata_hash VARCHAR(255)
-            )
-        """)
+        # Fast path: this schema version is already applied, so skip the DDL and its catalog locks
+        if await _applied_schema_version(conn) < _SCHEMA_VERSION:
+            async with conn.transaction():
+                # Serialize concurrent worker boots so only one of them runs the DDL
+                await conn.execute("SELECT pg_advisory_xact_lock($1)", _SCHEMA_INIT_LOCK_ID)
+                if await _applied_schema_version(conn) < _SCHEMA_VERSION:
+                    await conn.execute(_SCHEMA_DDL)
+                    await conn.execute(
+                        "INSERT INTO schema_version (version) VALUES ($1) ON CONFLICT DO NOTHING", _SCHEMA_VERSION
+                    )
+                    print("Database tables initialized successfully")
         
-        # Create pipeline_runs table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS pipeline_runs (
-                id SERIAL PRIMARY KEY,
-                pipeline_id VARCHAR(255) UNIQUE NOT NULL,
-                status VARCHAR(50) NOT NULL DEFAULT 'RUNNING',
-                current_cycle INTEGER DEFAULT 0,
-                total_cycles INTEGER DEFAULT 1,
-                articles_processed INTEGER DEFAULT 0,
-                error_message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                ended_at TIMESTAMP,
-                duration_minutes INTEGER DEFAULT 30
-            )
+        # Which partitions are needed depends on the date, not the schema version,
+        # so check them on every start rather than waiting for the maintenance task
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", _SCHEMA_INIT_LOCK_ID)
+            await _create_agent_log_partitions(conn)
+
+def _add_months(month_start: date, months: int) -> date:
+    """Shift the first day of a month by a number of months"""
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+async def _is_agent_logs_partitioned(conn) -> bool:
+    """Check whether agent_logs is a partitioned table (older deployments are not)"""
+    return bool(await conn.fetchval(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('public.agent_logs')"
+    ))
+
+async def _create_agent_log_partitions(conn):
+    """Create the agent_logs partitions for the current and next month"""
+    if not await _is_agent_logs_partitioned(conn):
+        return
+    this_month = await conn.fetchval("SELECT date_trunc('month', LOCALTIMESTAMP)::date")
+    for offset in range(AGENT_LOG_PARTITIONS_AHEAD + 1):
+        start = _add_months(this_month, offset)
+        end = _add_months(start, 1)
+        await conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS agent_logs_{start:%Y_%m}
+            PARTITION OF agent_logs FOR VALUES FROM ('{start}') TO ('{end}')
         """)
+
+async def maintain_agent_log_partitions():
+    """Create upcoming agent_logs partitions and drop the ones past retention"""
+    async with get_db_connection() as conn:
+        if not await _is_agent_logs_partitioned(conn):
+            return
+        await _create_agent_log_partitions(conn)
         
-        # Create agent_logs table for detailed logging
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS agent_logs (
-                id SERIAL PRIMARY KEY,
-                pipeline_id VARCHAR(255),
-                agent_name VARCHAR(100) NOT NULL,
-                message TEXT NOT NULL,
-                log_level VARCHAR(20) DEFAULT 'INFO',
-                data JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+        this_month = await conn.fetchval("SELECT date_trunc('month', LOCALTIMESTAMP)::date")
+        cutoff = _add_months(this_month, -AGENT_LOG_RETENTION_MONTHS)
+        partitions = await conn.fetch("""
+            SELECT c.relname FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'public.agent_logs'::regclass
         """)
-        
-        print("Database tables initialized successfully")
+        for partition in partitions:
+            name = partition['relname']
+            try:
+                start = datetime.strptime(name, "agent_logs_%Y_%m").date()
+            except ValueError:
+                continue
+            if start < cutoff:
+                await conn.execute(f"ALTER TABLE agent_logs DETACH PARTITION {name}")
+                await conn.execute(f"DROP TABLE {name}")
+                print(f"Dropped expired agent log partition {name}")
 
-# Database operations
+async def run_agent_log_maintenance(interval_seconds: int = 24 * 60 * 60):
+    """Periodically maintain agent_logs partitions (runs until cancelled)"""
+    while True:
+        try:
+            await maintain_agent_log_partitions()
+        except Exception as e:
+            print(f"Agent log partition maintenance error: {e}")
+        await asyncio.sleep(interval_seconds)
+
+# Database operations (read helpers return asyncpg Records, which support [key] and .get())
 async def create_user(email: str, full_name: str, hashed_password: str, is_admin: bool = False):
-    """Create a new user in database"""
+    """Create a new user unless the email is taken; returns None for a duplicate"""
     async with get_db_connection() as conn:
-        user_record = await conn.fetchrow("""
-            INSERT INTO users (email, full_name, hashed_password, is_admin)
-            VALUES ($1, $2, $3, $4)
-            RETURNING id, email, full_name, is_active, is_admin, created_at
-        """, email, full_name, hashed_password, is_admin)
-        return dict(user_record)
+        statement = await _stmt(conn, "create_user")
+        user_record = await statement.fetchrow(email, full_name, hashed_password, is_admin)
+    if user_record is not None:
+        _user_cache.pop(email, None)
+    return user_record
 
 async def get_user_by_email(email: str):
     """Get user by email from database"""
+    user_record = _user_cache.get(email, _USER_CACHE_MISS)
+    if user_record is not _USER_CACHE_MISS:
+        return user_record
+    
     async with get_db_connection() as conn:
-        user_record = await conn.fetchrow("""
-            SELECT id, email, full_name, hashed_password, is_active, is_admin, created_at
-            FROM users WHERE email = $1
-        """, email)
-        return dict(user_record) if user_record else None
+        statement = await _stmt(conn, "get_user_by_email")
+        user_record = await statement.fetchrow(email)
+    _user_cache[email] = user_record
+    return user_record
 
 async def get_user_by_id(user_id: int):
     """Get user by ID from database"""
     async with get_db_connection() as conn:
-        user_record = await conn.fetchrow("""
-            SELECT id, email, full_name, hashed_password, is_active, is_admin, created_at
-            FROM users WHERE id = $1
-        """, user_id)
-        return dict(user_record) if user_record else None
+        statement = await _stmt(conn, "get_user_by_id")
+        user_record = await statement.fetchrow(user_id)
+        return user_record
 
 async def update_user_activity(email: str, is_active: bool):
     """Update user activity status"""
     async with get_db_connection() as conn:
-        await conn.execute("""
-            UPDATE users SET is_active = $1 WHERE email = $2
-        """, is_active, email)
+        statement = await _stmt(conn, "update_user_activity")
+        await statement.fetchval(is_active, email)
+    _user_cache.pop(email, None)
+
+async def update_user_password_hash(user_id: int, email: str, hashed_password: str):
+    """Replace a user's stored password hash (used to upgrade old bcrypt hashes)"""
+    async with get_db_connection() as conn:
+        statement = await _stmt(conn, "update_user_password_hash")
+        await statement.fetchval(hashed_password, user_id)
+    _user_cache.pop(email, None)
+
+async def toggle_user_activity(user_id: int):
+    """Flip a user's active flag; returns the email and new is_active, or None if not found"""
+    async with get_db_connection() as conn:
+        statement = await _stmt(conn, "toggle_user_activity")
+        user_record = await statement.fetchrow(user_id)
+    if user_record is not None:
+        _user_cache.pop(user_record['email'], None)
+    return user_record
 
 async def get_all_users():
     """Get all users (admin only)"""
     async with get_db_connection() as conn:
-        users = await conn.fetch("""
-            SELECT id, email, full_name, is_active, is_admin, created_at
-            FROM users ORDER BY created_at DESC
-        """)
-        return [dict(user) for user in users]
+        statement = await _stmt(conn, "get_all_users")
+        users = await statement.fetch()
+        return users
 
-async def log_agent_activity(pipeline_id: str, agent_name: str, message: str, log_level: str = "INFO", data: dict = None):
-    """Log agent activity"""
+async def get_all_users_json() -> str:
+    """Get all users as a JSON array string built by Postgres (admin only)"""
     async with get_db_connection() as conn:
-        # Convert data to JSON string if it's a dict, or set to None if empty
-        json_data = None
-        if data is not None:
-            if isinstance(data, dict):
-                json_data = json.dumps(data) if data else None
-            else:
-                json_data = str(data)
-        
-        await conn.execute("""
-            INSERT INTO agent_logs (pipeline_id, agent_name, message, log_level, data)
-            VALUES ($1, $2, $3, $4, $5::jsonb)
-        """, pipeline_id, agent_name, message, log_level, json_data)
+        statement = await _stmt(conn, "get_all_users_json")
+        return await statement.fetchval()
+
+async def log_agent_activity(pipeline_id: str, agent_name: str, message: str, log_level: str = "INFO", data: dict = None):
+    """Queue an agent log row; _flush_agent_logs writes it to the database in batches"""
+    try:
+        _agent_log_queue.put_nowait((pipeline_id, agent_name, message, log_level, data))
+    except asyncio.QueueFull:
+        print(f"Agent log queue full, dropping log from {agent_name}")
+
+def _drain_agent_log_queue(batch: list) -> list:
+    """Move already-queued log rows into batch, up to the batch size"""
+    while len(batch) < _AGENT_LOG_BATCH_SIZE and not _agent_log_queue.empty():
+        batch.append(_agent_log_queue.get_nowait())
+    return batch
+
+async def _write_agent_logs(batch: list):
+    """COPY a batch of queued log rows into agent_logs"""
+    if not batch:
+        return
+    records = []
+    for pipeline_id, agent_name, message, log_level, data in batch:
+        # Empty dicts are stored as NULL; the jsonb codec encodes everything else
+        if isinstance(data, dict) and not data:
+            data = None
+        elif data is not None and not isinstance(data, dict):
+            data = str(data)
+        records.append((pipeline_id, agent_name, message, log_level, data))
+    await _copy_agent_logs(records)
+
+async def _copy_agent_logs(records: list):
+    """COPY log rows, halving the batch when Postgres rejects it so one bad row
+    doesn't lose the rest"""
+    try:
+        async with get_db_connection() as conn:
+            await conn.copy_records_to_table("agent_logs", records=records, columns=_AGENT_LOG_COLUMNS)
+    except asyncpg.PostgresError as e:
+        if len(records) == 1:
+            print(f"Dropping agent log row from {records[0][1]}: {e}")
+            return
+        middle = len(records) // 2
+        await _copy_agent_logs(records[:middle])
+        await _copy_agent_logs(records[middle:])
+
+async def _flush_agent_logs():
+    """Background task that ships queued agent logs with COPY"""
+    while True:
+        # Rows queued while the previous COPY was running go out together
+        batch = _drain_agent_log_queue([await _agent_log_queue.get()])
+        try:
+            # Shielded so shutdown does not abort a batch halfway through
+            await asyncio.shield(_write_agent_logs(batch))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error writing {len(batch)} agent log rows: {e}")
 
 # Pipeline management functions
-async def create_pipeline_run(pipeline_id: str, duration_minutes: int):
-    """Create a new pipeline run record"""
+async def create_pipeline_run(pipeline_id: str, duration_minutes: int) -> int:
+    """Create a new pipeline run record and return its id"""
+    async with get_db_connection() as conn:
+        # Callers only need the generated id; fetchval skips building a Record
+        statement = await _stmt(conn, "create_pipeline_run")
+        return await statement.fetchval(pipeline_id, duration_minutes)
+
+async def update_pipeline_tick(pipeline_id: str, status: str = None, current_cycle: int = None,
+                               articles_processed: int = None, error_message: str = None):
+    """Update pipeline status and progress in a single statement; None leaves a field unchanged"""
     async with get_db_connection() as conn:
-        record = await conn.fetchrow("""
-            INSERT INTO pipeline_runs (pipeline_id, status, duration_minutes, started_at)
-            VALUES ($1, 'RUNNING', $2, CURRENT_TIMESTAMP)
-            RETURNING id, pipeline_id, status, current_cycle, total_cycles, 
-                      articles_processed, created_at, updated_at, started_at, duration_minutes
-        """, pipeline_id, duration_minutes)
-        return dict(record)
+        statement = await _stmt(conn, "update_pipeline_tick")
+        await statement.fetchval(pipeline_id, status, current_cycle, articles_processed, error_message)
 
 async def update_pipeline_status(pipeline_id: str, status: str, error_message: str = None):
     """Update pipeline status"""
-    async with get_db_connection() as conn:
-        if status in ['COMPLETED', 'STOPPED', 'ERROR']:
-            await conn.execute("""
-                UPDATE pipeline_runs 
-                SET status = $1, error_message = $2, ended_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
-                WHERE pipeline_id = $3
-            """, status, error_message, pipeline_id)
-        else:
-            await conn.execute("""
-                UPDATE pipeline_runs 
-                SET status = $1, error_message = $2, updated_at = CURRENT_TIMESTAMP
-                WHERE pipeline_id = $3
-            """, status, error_message, pipeline_id)
+    await update_pipeline_tick(pipeline_id, status=status, error_message=error_message)
 
 async def update_pipeline_progress(pipeline_id: str, current_cycle: int, articles_processed: int):
     """Update pipeline progress"""
-    async with get_db_connection() as conn:
-        await conn.execute("""
-            UPDATE pipeline_runs 
-            SET current_cycle = $1, articles_processed = $2, updated_at = CURRENT_TIMESTAMP
-            WHERE pipeline_id = $3
-        """, current_cycle, articles_processed, pipeline_id)
+    await update_pipeline_tick(pipeline_id, current_cycle=current_cycle, articles_processed=articles_processed)
 
 async def get_pipeline_run(pipeline_id: str):
     """Get pipeline run details"""
     async with get_db_connection() as conn:
-        record = await conn.fetchrow("""
-            SELECT id, pipeline_id, status, current_cycle, total_cycles, 
-                   articles_processed, error_message, created_at, updated_at, 
-                   started_at, ended_at, duration_minutes
-            FROM pipeline_runs WHERE pipeline_id = $1
-        """, pipeline_id)
-        return dict(record) if record else None
+        statement = await _stmt(conn, "get_pipeline_run")
+        record = await statement.fetchrow(pipeline_id)
+        return record
 
 async def get_active_pipeline_runs():
     """Get all active pipeline runs"""
     async with get_db_connection() as conn:
-        records = await conn.fetch("""
-            SELECT id, pipeline_id, status, current_cycle, total_cycles, 
-                   articles_processed, created_at, updated_at, started_at, duration_minutes
-            FROM pipeline_runs 
-            WHERE status = 'RUNNING'
-            ORDER BY created_at DESC
-        """)
-        return [dict(record) for record in records]
+        statement = await _stmt(conn, "get_active_pipeline_runs")
+        records = await statement.fetch()
+        return records
+
+@lru_cache(maxsize=_ARTICLE_INSERT_CHUNK_SIZE)
+def _article_insert_sql(row_count: int) -> str:
+    """Build a multi-row INSERT for row_count articles"""
+    width = len(_ARTICLE_INSERT_COLUMNS)
+    source_col = _ARTICLE_INSERT_COLUMNS.index("source")
+    placeholders = []
+    for row in range(row_count):
+        params = []
+        for col in range(width):
+            params.append(f"${row * width + col + 1}")
+        # source_id is resolved from the row's own source parameter
+        params.append(f"(SELECT id FROM sources WHERE name = ${row * width + source_col + 1})")
+        placeholders.append(f"({', '.join(params)})")
+    return f"""
+        INSERT INTO articles ({', '.join(_ARTICLE_INSERT_COLUMNS)}, source_id)
+        VALUES {', '.join(placeholders)}
+        RETURNING id
+    """
+
+async def save_articles_bulk(rows: List[dict]) -> List[int]:
+    """Save generated articles with multi-row INSERTs and return their ids in input order"""
+    article_ids = []
+    if not rows:
+        return article_ids
+    
+    async with get_db_connection() as conn:
+        # One transaction, so a failing row leaves nothing half-saved for the caller to retry
+        async with conn.transaction():
+            # Register any new source names so the INSERT can resolve their ids
+            statement = await _stmt(conn, "upsert_sources")
+            await statement.fetchval([row.get('source') for row in rows])
+            
+            for offset in range(0, len(rows), _ARTICLE_INSERT_CHUNK_SIZE):
+                chunk = rows[offset:offset + _ARTICLE_INSERT_CHUNK_SIZE]
+                args = []
+                for row in chunk:
+                    args.extend((
+                        row['original_title'],
+                        row.get('original_link'),
+                        row.get('image_url'),
+                        row['generated_content'],
+                        row.get('authenticity_score') or None,
+                        row.get('source'),
+                        row.get('pipeline_id'),
+                        row.get('cycle_number')
+                    ))
+                records = await conn.fetch(_article_insert_sql(len(chunk)), *args)
+                article_ids.extend(record['id'] for record in records)
+            
+            await conn.execute("NOTIFY article_inserted")
+    
+    return article_ids
 
 async def save_article_to_db(pipeline_id: str, original_title: str, original_link: str, 
                            image_url: str, generated_content: str, authenticity_score: dict, 
                            source: str, cycle_number: int) -> int:
     """Save generated article to database"""
-    async with get_db_connection() as conn:
-        article_id = await conn.fetchval("""
-            INSERT INTO articles (original_title, original_link, image_url, generated_content, authenticity_score, source, pipeline_id, cycle_number)
-            VALUES ($1, $2, $3, $4, $5::jsonb, $6, $7, $8)
-            RETURNING id
-        """, 
-        original_title,
-        original_link,
-        image_url,
-        generated_content,
-        json.dumps(authenticity_score) if authenticity_score else None,
-        source,
-        pipeline_id,
-        cycle_number
-        )
-        
-        return article_id
+    article_ids = await save_articles_bulk([{
+        "original_title": original_title,
+        "original_link": original_link,
+        "image_url": image_url,
+        "generated_content": generated_content,
+        "authenticity_score": authenticity_score,
+        "source": source,
+        "pipeline_id": pipeline_id,
+        "cycle_number": cycle_number
+    }])
+    return article_ids[0]
 
-async def update_article_blockchain_info(article_id: int, blockchain_info: dict):
-    """Update article with blockchain information"""
-    async with get_db_connection() as conn:
-        await conn.execute("""
-            UPDATE articles 
-            SET blockchain_stored = $2,
-                blockchain_transaction_hash = $3,
-                blockchain_article_id = $4,
-                blockchain_network = $5,
-                blockchain_explorer_url = $6,
-                content_hash = $7,
-                metadata_hash = $8
-            WHERE id = $1
-        """, 
+def _blockchain_info_args(article_id: int, blockchain_info: dict) -> tuple:
+    """Arguments for the update_article_blockchain_info statement"""
+    return (
         article_id,
         blockchain_info.get('stored_on_chain', False),
         blockchain_info.get('transaction_hash'),
@@ -281,187 +844,194 @@ async def update_article_blockchain_info(article_id: int, blockchain_info: dict)
         blockchain_info.get('explorer_url'),
         blockchain_info.get('content_hash'),
         blockchain_info.get('metadata_hash')
-        )
+    )
+
+async def update_article_blockchain_info(article_id: int, blockchain_info: dict):
+    """Update article with blockchain information"""
+    async with get_db_connection() as conn:
+        statement = await _stmt(conn, "update_article_blockchain_info")
+        await statement.fetchval(*_blockchain_info_args(article_id, blockchain_info))
+
+async def update_articles_blockchain_info_bulk(items: List[tuple]):
+    """Update several articles from (article_id, blockchain_info) pairs in one pipelined batch"""
+    if not items:
+        return
+    async with get_db_connection() as conn:
+        statement = await _stmt(conn, "update_article_blockchain_info")
+        # executemany streams every Bind/Execute and waits for a single Sync
+        await statement.executemany([_blockchain_info_args(article_id, info) for article_id, info in items])
 
 async def get_articles(limit: int = 50, pipeline_id: str = None):
     """Get articles from database"""
     async with get_db_connection() as conn:
         if pipeline_id:
-            articles = await conn.fetch("""
-                SELECT id, original_title, original_link, image_url, generated_content, 
-                       authenticity_score, source, processed_at, created_at, pipeline_id, cycle_number,
-                       blockchain_stored, blockchain_transaction_hash, blockchain_article_id,
-                       blockchain_network, blockchain_explorer_url, content_hash, metadata_hash
-                FROM articles 
-                WHERE pipeline_id = $1
-                ORDER BY created_at DESC 
-                LIMIT $2
-            """, pipeline_id, limit)
+            statement = await _stmt(conn, "get_articles_by_pipeline")
+            articles = await statement.fetch(pipeline_id, limit)
         else:
-            articles = await conn.fetch("""
-                SELECT id, original_title, original_link, image_url, generated_content, 
-                       authenticity_score, source, processed_at, created_at, pipeline_id, cycle_number,
-                       blockchain_stored, blockchain_transaction_hash, blockchain_article_id,
-                       blockchain_network, blockchain_explorer_url, content_hash, metadata_hash
-                FROM articles 
-                ORDER BY created_at DESC 
-                LIMIT $1
-            """, limit)
+            statement = await _stmt(conn, "get_articles")
+            articles = await statement.fetch(limit)
         
-        return [dict(article) for article in articles]
+        return articles
+
+async def iter_articles(limit: int = 50, pipeline_id: str = None, prefetch: int = 50):
+    """Yield articles through a server-side cursor, on a connection of its own"""
+    # Runs while a streaming response is being sent, after the request's db_scope
+    # connection has been released, so it cannot use get_db_connection()
+    async with _require_pool().acquire() as conn:
+        if pipeline_id:
+            statement = await _stmt(conn, "get_articles_by_pipeline")
+            args = (pipeline_id, limit)
+        else:
+            statement = await _stmt(conn, "get_articles")
+            args = (limit,)
+        async with conn.transaction():
+            async for article in statement.cursor(*args, prefetch=prefetch):
+                yield article
 
 async def get_dashboard_stats():
     """Get dashboard statistics"""
+    now = time.monotonic()
+    if _dashboard_stats_cache["data"] is not None and now - _dashboard_stats_cache["ts"] < DASHBOARD_STATS_TTL:
+        return _dashboard_stats_cache["data"]
+    
+    # All four counts come back in one statement and one round trip
     async with get_db_connection() as conn:
-        # Get total articles
-        total_articles = await conn.fetchval("SELECT COUNT(*) FROM articles") or 0
-        
-        # Get articles today
-        articles_today = await conn.fetchval("""
-            SELECT COUNT(*) FROM articles 
-            WHERE DATE(created_at) = CURRENT_DATE
-        """) or 0
-        
-        # Get blockchain stored articles
-        blockchain_articles = await conn.fetchval("""
-            SELECT COUNT(*) FROM articles 
-            WHERE blockchain_stored = true
-        """) or 0
-        
-        # Get running pipelines count
-        running_pipelines = await conn.fetchval("""
-            SELECT COUNT(*) FROM pipeline_runs 
-            WHERE status = 'RUNNING'
-        """) or 0
-        
-        return {
-            "total_articles": total_articles,
-            "articles_today": articles_today,
-            "blockchain_articles": blockchain_articles,
-            "running_pipelines": running_pipelines
-        }
+        statement = await _stmt(conn, "get_dashboard_stats")
+        stats = await statement.fetchrow()
+    
+    data = {key: value or 0 for key, value in stats.items()}
+    _dashboard_stats_cache.update(ts=now, data=data)
+    return data
+
+def _expire_dashboard_stats(*_):
+    _dashboard_stats_cache["ts"] = 0.0
+
+async def listen_for_article_inserts():
+    """Hold a connection LISTENing on article_inserted to expire the cached dashboard stats"""
+    if USE_PGBOUNCER:
+        # Transaction pooling cannot keep a session-level LISTEN; the TTL alone applies
+        return
+    async with get_db_connection() as conn:
+        await conn.add_listener("article_inserted", _expire_dashboard_stats)
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await conn.remove_listener("article_inserted", _expire_dashboard_stats)
+
+def _keywords_to_tsquery(keywords: List[str]) -> Optional[str]:
+    """Build a tsquery matching any keyword, with multi-word keywords as phrases"""
+    phrases = []
+    for keyword in keywords:
+        tokens = _TSQUERY_TOKEN.findall(keyword)
+        if tokens:
+            phrases.append(f"({' <-> '.join(tokens)})")
+    return " | ".join(phrases) or None
 
 async def search_articles_by_keywords(keywords: List[str], limit: int = 50):
-    """Search articles by keywords for relevance scoring"""
+    """Search articles by keywords, ranked by full-text relevance"""
+    query = _keywords_to_tsquery(keywords or [])
+    if not query:
+        return []
+    
     async with get_db_connection() as conn:
-        if not keywords:
-            return []
-            
-        # Create search conditions with proper parameter handling
-        search_conditions = []
-        params = []
-        
-        for i, keyword in enumerate(keywords):
-            # Each keyword gets two parameters (for title and content search)
-            title_param = f"${len(params) + 1}"
-            content_param = f"${len(params) + 2}"
-            
-            search_conditions.append(f"(original_title ILIKE {title_param} OR generated_content ILIKE {content_param})")
-            params.append(f"%{keyword}%")
-            params.append(f"%{keyword}%")
-        
-        if not search_conditions:
-            return []
-            
-        # Add limit parameter
-        limit_param = f"${len(params) + 1}"
-        params.append(limit)
-        
-        query = f"""
-            SELECT id, original_title, image_url, generated_content, source, created_at,
-                   blockchain_stored, blockchain_explorer_url, blockchain_transaction_hash,
-                   1.0 as relevance_score
-            FROM articles 
-            WHERE {' OR '.join(search_conditions)}
-            ORDER BY created_at DESC
-            LIMIT {limit_param}
-        """
-        
-        articles = await conn.fetch(query, *params)
-        return [dict(article) for article in articles]
+        statement = await _stmt(conn, "search_articles")
+        articles = await statement.fetch(query, limit)
+        return articles
+
+async def get_popular_tags():
+    """Get the most common article tags and how many recent articles were analyzed"""
+    async with get_db_connection() as conn:
+        statement = await _stmt(conn, "get_popular_tags")
+        row = await statement.fetchrow()
+    return list(row['tags']), row['articles_analyzed']
+
+@lru_cache(maxsize=16)
+def _build_articles_sql(has_from: bool, has_to: bool, has_source: bool, has_interests: bool) -> tuple:
+    """Build (page_sql, count_sql) for one shape of get_user_articles filters"""
+    where_conditions = []
+    param_count = 0
+    if has_from:
+        param_count += 1
+        where_conditions.append(f"created_at >= ${param_count}")
+    if has_to:
+        param_count += 1
+        where_conditions.append(f"created_at <= ${param_count}")
+    if has_source:
+        param_count += 1
+        # Match names in the small sources table, then use the source_id index
+        where_conditions.append(f"source_id IN (SELECT id FROM sources WHERE name ILIKE ${param_count})")
+    from_clause = "articles"
+    rank_column = ""
+    order_by = "created_at DESC"
+    if has_interests:
+        # Interest-based filtering using the full-text index, ranked by cover density
+        # (normalized to 0..1) so pages come back most relevant first
+        param_count += 1
+        from_clause = f"articles, to_tsquery('english', ${param_count}) AS query"
+        where_conditions.append("search_tsv @@ query")
+        rank_column = "ts_rank_cd(search_tsv, query, 32) AS relevance_score,"
+        order_by = "relevance_score DESC, created_at DESC"
+    
+    where_clause = ""
+    if where_conditions:
+        where_clause = "WHERE " + " AND ".join(where_conditions)
+    
+    # One scan returns both the page and the total match count (_total)
+    page_sql = f"""
+        SELECT id, original_title, image_url, generated_content, source, created_at, processed_at,
+               blockchain_stored, blockchain_transaction_hash, blockchain_article_id,
+               blockchain_network, blockchain_explorer_url, content_hash, metadata_hash,
+               {rank_column}
+               COUNT(*) OVER () AS _total
+        FROM {from_clause}
+        {where_clause}
+        ORDER BY {order_by}
+        LIMIT ${param_count + 1} OFFSET ${param_count + 2}
+    """
+    count_sql = f"SELECT COUNT(*) FROM {from_clause} {where_clause}"
+    return page_sql, count_sql
 
 async def get_user_articles(interests: List[str] = None, page: int = 1, page_size: int = 10, 
                            source_filter: str = None, date_from: datetime = None, 
                            date_to: datetime = None):
     """Get articles for users with filtering and pagination"""
+    interests_query = _keywords_to_tsquery(interests) if interests else None
+    
+    # Parameters in the same order _build_articles_sql numbers them
+    params = [value for value in (
+        date_from,
+        date_to,
+        f"%{source_filter}%" if source_filter else None,
+        interests_query
+    ) if value]
+    page_sql, count_sql = _build_articles_sql(
+        bool(date_from), bool(date_to), bool(source_filter), bool(interests_query)
+    )
+    offset = (page - 1) * page_size
+    
     async with get_db_connection() as conn:
-        # Build the WHERE clause based on filters
-        where_conditions = []
-        params = []
-        
-        # Convert datetime objects to timezone-aware if they're naive
-        if date_from:
-            if date_from.tzinfo is None:
-                date_from = date_from.replace(tzinfo=timezone.utc)
-            where_conditions.append(f"created_at >= ${len(params) + 1}")
-            params.append(date_from)
-            
-        if date_to:
-            if date_to.tzinfo is None:
-                date_to = date_to.replace(tzinfo=timezone.utc)
-            where_conditions.append(f"created_at <= ${len(params) + 1}")
-            params.append(date_to)
-            
-        # Source filter
-        if source_filter:
-            where_conditions.append(f"source ILIKE ${len(params) + 1}")
-            params.append(f"%{source_filter}%")
-            
-        # Interest-based filtering using full-text search
-        if interests and len(interests) > 0:
-            interest_conditions = []
-            for interest in interests:
-                title_param = f"${len(params) + 1}"
-                content_param = f"${len(params) + 2}"
-                interest_conditions.append(f"(original_title ILIKE {title_param} OR generated_content ILIKE {content_param})")
-                params.append(f"%{interest}%")
-                params.append(f"%{interest}%")
-            
-            if interest_conditions:
-                where_conditions.append(f"({' OR '.join(interest_conditions)})")
-        
-        # Build WHERE clause
-        where_clause = ""
-        if where_conditions:
-            where_clause = "WHERE " + " AND ".join(where_conditions)
-        
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM articles {where_clause}"
         try:
-            if params:
-                total_count = await conn.fetchval(count_query, *params)
-            else:
-                total_count = await conn.fetchval(count_query)
-            total_count = total_count or 0
-        except Exception as e:
-            print(f"Error getting count: {e}")
-            total_count = 0
-        
-        # Calculate pagination
-        offset = (page - 1) * page_size
-        limit_param = f"${len(params) + 1}"
-        offset_param = f"${len(params) + 2}"
-        
-        # Get articles with pagination including blockchain info and image_url
-        articles_query = f"""
-            SELECT id, original_title, image_url, generated_content, source, created_at, processed_at,
-                   blockchain_stored, blockchain_transaction_hash, blockchain_article_id,
-                   blockchain_network, blockchain_explorer_url, content_hash, metadata_hash
-            FROM articles 
-            {where_clause}
-            ORDER BY created_at DESC 
-            LIMIT {limit_param} OFFSET {offset_param}
-        """
-        
-        try:
-            articles = await conn.fetch(articles_query, *params, page_size, offset)
+            articles = await conn.fetch(page_sql, *params, page_size, offset, record_class=ArticleRow)
         except Exception as e:
             print(f"Error fetching articles: {e}")
             articles = []
         
+        if articles:
+            total_count = articles[0]["_total"]
+        elif offset > 0:
+            # Past the last page there are no rows to carry the window count
+            try:
+                total_count = await conn.fetchval(count_sql, *params) or 0
+            except Exception as e:
+                print(f"Error getting count: {e}")
+                total_count = 0
+        else:
+            total_count = 0
+        
         return {
-            "articles": [dict(article) for article in articles],
+            # Records are handed over as-is; callers read columns by key and ignore _total
+            "articles": articles,
             "total_count": total_count,
             "page": page,
             "page_size": page_size
-        }
\ No newline at end of file
+        }
@@ -1,11 +1,19 @@
-from fastapi import FastAPI, HTTPException, Depends, status, WebSocket, WebSocketDisconnect, BackgroundTasks, Query
+from fastapi import APIRouter, FastAPI, HTTPException, Request, Depends, status, WebSocket, WebSocketDisconnect, BackgroundTasks, Query
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from datetime import timedelta, datetime, timezone
 from contextlib import asynccontextmanager
+from typing import Optional
 import os
-import json
 import asyncio
-import math
+import contextvars
+import re
+import sys
+import orjson
+from functools import lru_cache
+from pydantic import TypeAdapter, ValidationError
+from cachetools import TTLCache
 from schemas import (
     UserCreate, UserResponse, User, Token, LoginRequest, 
     AdminUserCreate, AdminLoginRequest, UserUpdate
@@ -15,29 +23,63 @@ from admin_schemas import (
     ArticleResponse, AdminDashboardStats, PipelineRunResponse
 )
 from auth import (
-    get_password_hash, authenticate_user, authenticate_admin, create_access_token,
-    get_current_active_user, get_current_admin_user, ACCESS_TOKEN_EXPIRE_MINUTES
+    hash_password, start_password_executor, shutdown_password_executor,
+    authenticate_user, authenticate_admin, create_access_token,
+    get_current_active_user, get_current_admin_user, invalidate_cached_user,
+    ACCESS_TOKEN_EXPIRE_MINUTES
 )
 from database import (
-    create_connection_pool, close_connection_pool, init_database,
-    create_user, get_user_by_email, get_all_users, update_user_activity,
-    get_db_connection, get_active_pipeline_runs, get_articles, get_dashboard_stats,
-    get_user_articles, search_articles_by_keywords
+    create_connection_pool, close_connection_pool, init_database, run_agent_log_maintenance,
+    listen_for_article_inserts,
+    create_user, get_all_users_json, toggle_user_activity,
+    get_db_connection, db_scope, get_active_pipeline_runs, iter_articles, get_dashboard_stats,
+    get_user_articles, search_articles_by_keywords, get_popular_tags
 )
 from agents import NewsAgent
 from websocket_manager import manager
 from user_schemas import (
-    BlockchainInfo, UserArticleRequest, UserArticleResponse, UserArticlesPageResponse
+    BlockchainInfo, BlockchainStatistics, UserArticleRequest, UserArticleResponse, UserArticlesPageResponse,
+    ArticleSearchResponse, PopularInterestsResponse
 )
 from blockchain_integration import BlockchainHasher
 
+# HEADLINE:/TAGS: lines of an agent-generated article body
+_HEADLINE_RE = re.compile(r"^[ \t]*HEADLINE:[ \t]*(.*?)[ \t\r]*$", re.M)
+_TAGS_RE = re.compile(r"^[ \t]*TAGS:[ \t]*(.*?)[ \t\r]*$", re.M)
+_TAG_SPLIT = re.compile(r"\s*,\s*")
+
+def _parse_generated_content(generated_content: str, title: str):
+    """Return the HEADLINE (or the given title) and TAGS of a generated article"""
+    tags = []
+    if generated_content and "HEADLINE:" in generated_content:
+        headline = _HEADLINE_RE.search(generated_content)
+        if headline:
+            title = headline.group(1)
+        tag_line = _TAGS_RE.search(generated_content)
+        if tag_line:
+            # Interned: the same few tags repeat across every article on a page
+            tags = [sys.intern(tag) for tag in _TAG_SPLIT.split(tag_line.group(1)) if tag]
+    return title, tags
+
+# /user/articles/interests response model, shared by every caller for 5 minutes;
+# the lock makes concurrent misses wait for one computation
+_interests_cache = TTLCache(maxsize=1, ttl=300)
+_interests_lock = asyncio.Lock()
+
+# Built once so every UserResponse goes through the same compiled validator
+_USER_ADAPTER = TypeAdapter(UserResponse)
+
 # Global variables
 news_agent = None
-background_tasks = set()
+# Shared Web3 connection for the /blockchain routes, built once at startup
+blockchain_hasher = None
+# Owns every background task for the app's lifetime; see create_background_task
+background_task_group: Optional[asyncio.TaskGroup] = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    start_password_executor()
     await create_connection_pool()
     await init_database()
     
@@ -49,23 +91,36 @@ async def lifespan(app: FastAPI):
     else:
         news_agent = NewsAgent(gemini_api_key, manager)
     
+    global blockchain_hasher
+    try:
+        # The constructor does a blocking RPC connectivity check
+        blockchain_hasher = await asyncio.to_thread(BlockchainHasher)
+    except Exception as e:
+        print(f"Warning: blockchain hasher init failed, will retry on first use: {e}")
+    
+    ready = asyncio.get_running_loop().create_future()
+    background_owner = asyncio.create_task(_hold_background_tasks(ready))
+    await ready
+    
     yield
     # Shutdown
     if news_agent and news_agent.is_running:
         news_agent.stop_pipeline()
     
-    # Cancel all background tasks
-    for task in background_tasks:
-        task.cancel()
-    await asyncio.gather(*background_tasks, return_exceptions=True)
+    # Cancelling the owner cancels every task in the group and waits for them
+    background_owner.cancel()
+    await asyncio.gather(background_owner, return_exceptions=True)
     
     await close_connection_pool()
+    shutdown_password_executor()
 
 app = FastAPI(
     title="AIC News Agency API",
     description="A news processing API with AI agents and admin functionality.",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Encode every JSON response with orjson instead of the stdlib json module
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware to allow all origins
@@ -77,22 +132,96 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+async def _hold_background_tasks(ready):
+    """Keep the background TaskGroup open until this task is cancelled at shutdown"""
+    global background_task_group
+    async with asyncio.TaskGroup() as background_task_group:
+        create_background_task(run_agent_log_maintenance())
+        create_background_task(listen_for_article_inserts())
+        ready.set_result(None)
+        await asyncio.Future()
+
+async def _run_background(coro):
+    # A failing task only reports itself; letting it raise would cancel its siblings
+    try:
+        await coro
+    except Exception as e:
+        print(f"Background task {asyncio.current_task().get_name()} failed: {e!r}")
+
+# Timestamp columns are naive UTC; orjson formats them in Rust with an explicit "Z"
+_ORJSON_STREAM_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+async def _start_json_array(rows, build_item):
+    """Read the first row before the response starts, so a failing query or pool
+    timeout can still become a 500, then stream the array from there"""
+    first = await anext(rows, None)
+    return _stream_json_array(first, rows, build_item)
+
+async def _stream_json_array(first, rows, build_item):
+    """Encode an async generator of rows as one JSON array, a row at a time"""
+    if first is None:
+        yield b"[]"
+        return
+    try:
+        yield b"[" + orjson.dumps(build_item(first), option=_ORJSON_STREAM_OPTIONS)
+        async for row in rows:
+            yield b"," + orjson.dumps(build_item(row), option=_ORJSON_STREAM_OPTIONS)
+    except Exception as e:
+        # Status and the opening bracket are already sent: abort the response rather
+        # than end it as a truncated array that still looks successful
+        print(f"Error streaming JSON array, response aborted: {e!r}")
+        raise
+    finally:
+        await rows.aclose()
+    yield b"]"
+
+_ARTICLE_RESPONSE_FIELDS = tuple(ArticleResponse.model_fields)
+
+@lru_cache(maxsize=256)
+def _source_fragment(source):
+    """A source name encoded once; there are only a handful of feeds"""
+    return orjson.Fragment(orjson.dumps(source))
+
+def _article_response_item(article):
+    # Same fields ArticleResponse declares; the blockchain columns are left out
+    item = {field: article[field] for field in _ARTICLE_RESPONSE_FIELDS}
+    item["source"] = _source_fragment(item["source"])
+    return item
+
+# Every /admin route except /admin/login, /admin/register and /admin/articles: one
+# request-scoped connection, then the admin check; handlers that need the admin
+# still declare it and get the cached value
+admin_router = APIRouter(
+    prefix="/admin",
+    dependencies=[Depends(db_scope), Depends(get_current_admin_user)]
+)
+
 def create_background_task(coro):
     """Create and track background tasks"""
-    task = asyncio.create_task(coro)
-    background_tasks.add(task)
-    task.add_done_callback(background_tasks.discard)
-    return task
+    # Start from an empty context so the task never inherits a request's db_scope connection
+    return background_task_group.create_task(_run_background(coro), context=contextvars.Context())
+
+# Probe responses never change, so encode them once
+_ROOT_RESPONSE = orjson.dumps({"message": "AIC News Agency API is running."})
+_HEALTH_RESPONSE = orjson.dumps({"status": "healthy", "service": "AIC News Agency API"})
 
 @app.get("/")
-def read_root():
+async def read_root():
     """Root endpoint."""
-    return {"message": "AIC News Agency API is running."}
+    return Response(content=_ROOT_RESPONSE, media_type="application/json")
 
 @app.get("/health")
-def health_check():
+async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "service": "AIC News Agency API"}
+    return Response(content=_HEALTH_RESPONSE, media_type="application/json")
+
+# Fixed websocket greeting, encoded once
+_WS_CONNECTED_MESSAGE = orjson.dumps({
+    "agent": "System",
+    "message": "Connected to AIC News Agency real-time updates",
+    "timestamp": "now",
+    "data": {"connected": True}
+}).decode()
 
 # WebSocket endpoint for real-time updates
 @app.websocket("/ws/admin")
@@ -100,30 +229,12 @@ async def websocket_endpoint(websocket: WebSocket):
     await manager.connect(websocket)
     try:
         # Send initial connection message
-        await websocket.send_text(json.dumps({
-            "agent": "System",
-            "message": "Connected to AIC News Agency real-time updates",
-            "timestamp": "now",
-            "data": {"connected": True}
-        }))
+        await websocket.send_text(_WS_CONNECTED_MESSAGE)
         
         while True:
-            # Keep connection alive and handle any incoming messages
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-                # Echo back for testing
-                await websocket.send_text(json.dumps({
-                    "agent": "Echo",
-                    "message": f"Received: {data}",
-                    "timestamp": "now"
-                }))
-            except asyncio.TimeoutError:
-                # Send ping to keep connection alive
-                await websocket.send_text(json.dumps({
-                    "agent": "System",
-                    "message": "ping",
-                    "timestamp": "now"
-                }))
+            # Incoming messages are ignored; uvicorn's protocol-level ping frames keep
+            # the connection alive and drop unresponsive clients
+            await websocket.receive_text()
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
@@ -131,33 +242,27 @@ async def websocket_endpoint(websocket: WebSocket):
         manager.disconnect(websocket)
 
 # User Registration and Authentication
+# The auth routes below spend most of their time hashing in the password executor,
+# so they take no db_scope connection; each query checks one out only while it runs
 @app.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user: UserCreate):
     """Register a new user."""
-    existing_user = await get_user_by_email(user.email)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     
+    # The unique email constraint decides duplicates in the same round trip as the insert
     user_record = await create_user(
         email=user.email,
         full_name=user.full_name,
         hashed_password=hashed_password,
         is_admin=False
     )
+    if user_record is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
-    return UserResponse(
-        id=user_record['id'],
-        email=user_record['email'],
-        full_name=user_record['full_name'],
-        is_active=user_record['is_active'],
-        is_admin=user_record['is_admin'],
-        created_at=user_record['created_at']
-    )
+    return _USER_ADAPTER.validate_python(dict(user_record))
 
 @app.post("/login", response_model=Token)
 async def login(login_data: LoginRequest):
@@ -180,33 +285,30 @@ async def login(login_data: LoginRequest):
     }
 
 # Admin Registration and Authentication
-@app.post("/admin/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def admin_register(user: AdminUserCreate, current_admin: User = Depends(get_current_admin_user)):
+@app.post(
+    "/admin/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(get_current_admin_user)]
+)
+async def admin_register(user: AdminUserCreate):
     """Register a new admin user. (Admin only)"""
-    existing_user = await get_user_by_email(user.email)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     
+    # The unique email constraint decides duplicates in the same round trip as the insert
     user_record = await create_user(
         email=user.email,
         full_name=user.full_name,
         hashed_password=hashed_password,
         is_admin=True
     )
+    if user_record is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
-    return UserResponse(
-        id=user_record['id'],
-        email=user_record['email'],
-        full_name=user_record['full_name'],
-        is_active=user_record['is_active'],
-        is_admin=user_record['is_admin'],
-        created_at=user_record['created_at']
-    )
+    return _USER_ADAPTER.validate_python(dict(user_record))
 
 @app.post("/admin/login", response_model=Token)
 async def admin_login(login_data: AdminLoginRequest):
@@ -229,65 +331,43 @@ async def admin_login(login_data: AdminLoginRequest):
     }
 
 # User Profile
-@app.get("/profile", response_model=UserResponse)
+@app.get("/profile", response_model=UserResponse, dependencies=[Depends(db_scope)])
 async def get_profile(current_user: User = Depends(get_current_active_user)):
     """Get current user profile."""
-    return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        full_name=current_user.full_name,
-        is_active=current_user.is_active,
-        is_admin=current_user.is_admin,
-        created_at=current_user.created_at
-    )
+    return _USER_ADAPTER.validate_python(current_user)
 
-@app.get("/protected")
+@app.get("/protected", dependencies=[Depends(db_scope)])
 async def protected_route(current_user: User = Depends(get_current_active_user)):
     """Protected route that requires authentication."""
     return {"message": f"Hello {current_user.full_name}, welcome to AIC News Agency!"}
 
 # Admin Routes
-@app.get("/admin/users", response_model=list[UserResponse])
-async def get_all_users_admin(current_admin: User = Depends(get_current_admin_user)):
+@admin_router.get("/users", response_model=list[UserResponse])
+async def get_all_users_admin():
     """Get all users. (Admin only)"""
-    users = await get_all_users()
-    return [
-        UserResponse(
-            id=user['id'],
-            email=user['email'],
-            full_name=user['full_name'],
-            is_active=user['is_active'],
-            is_admin=user['is_admin'],
-            created_at=user['created_at']
-        )
-        for user in users
-    ]
+    # Postgres builds the JSON array itself; response_model only documents the shape
+    return Response(content=await get_all_users_json(), media_type="application/json")
 
-@app.put("/admin/users/{user_id}/toggle-active")
-async def toggle_user_active(
-    user_id: int, 
-    current_admin: User = Depends(get_current_admin_user)
-):
+@admin_router.put("/users/{user_id}/toggle-active")
+async def toggle_user_active(user_id: int):
     """Toggle user active status. (Admin only)"""
-    from database import get_user_by_id
-    user_record = await get_user_by_id(user_id)
+    # Read and flip the flag in one statement
+    user_record = await toggle_user_activity(user_id)
     if not user_record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    # Tokens already resolved for this user must see the new flag right away
+    invalidate_cached_user(user_id)
     
-    new_status = not user_record['is_active']
-    await update_user_activity(user_record['email'], new_status)
+    new_status = user_record['is_active']
     
     return {"message": f"User {'activated' if new_status else 'deactivated'} successfully"}
 
 # News Processing Admin Routes
-@app.post("/admin/pipeline/start")
-async def start_pipeline(
-    request: PipelineStartRequest,
-    current_admin: User = Depends(get_current_admin_user)
-):
+@admin_router.post("/pipeline/start")
+async def start_pipeline(request: PipelineStartRequest):
     """Start the news processing pipeline. (Admin only)"""
     if not news_agent:
         raise HTTPException(
@@ -301,8 +381,9 @@ async def start_pipeline(
             detail="Pipeline is already running"
         )
     
-    # Start pipeline in background
-    task = create_background_task(news_agent.run_pipeline(request.duration_minutes))
+    # Start pipeline in background; shutdown cancels and awaits it with the other tasks
+    news_agent.task = create_background_task(news_agent.run_pipeline(request.duration_minutes))
+    news_agent.task.set_name("news-pipeline")
     
     return {
         "message": f"Pipeline started for {request.duration_minutes} minutes",
@@ -310,8 +391,8 @@ async def start_pipeline(
         "duration_minutes": request.duration_minutes
     }
 
-@app.post("/admin/pipeline/stop")
-async def stop_pipeline(current_admin: User = Depends(get_current_admin_user)):
+@admin_router.post("/pipeline/stop")
+async def stop_pipeline():
     """Stop the news processing pipeline. (Admin only)"""
     if not news_agent:
         raise HTTPException(
@@ -328,8 +409,8 @@ async def stop_pipeline(current_admin: User = Depends(get_current_admin_user)):
     news_agent.stop_pipeline()
     return {"message": "Pipeline stop requested"}
 
-@app.get("/admin/pipeline/status", response_model=PipelineStatusResponse)
-async def get_pipeline_status(current_admin: User = Depends(get_current_admin_user)):
+@admin_router.get("/pipeline/status", response_model=PipelineStatusResponse)
+async def get_pipeline_status():
     """Get pipeline status. (Admin only)"""
     if not news_agent:
         return PipelineStatusResponse(is_running=False)
@@ -343,11 +424,8 @@ async def get_pipeline_status(current_admin: User = Depends(get_current_admin_us
         total_articles_processed=status["total_articles_processed"]
     )
 
-@app.get("/admin/pipeline/runs", response_model=list[PipelineRunResponse])
-async def get_pipeline_runs(
-    limit: int = 10,
-    current_admin: User = Depends(get_current_admin_user)
-):
+@admin_router.get("/pipeline/runs", response_model=list[PipelineRunResponse])
+async def get_pipeline_runs(limit: int = 10):
     """Get pipeline run history. (Admin only)"""
     async with get_db_connection() as conn:
         runs = await conn.fetch("""
@@ -359,52 +437,36 @@ async def get_pipeline_runs(
             LIMIT $1
         """, limit)
         
-        return [
-            PipelineRunResponse(
-                id=run['id'],
-                pipeline_id=run['pipeline_id'],
-                status=run['status'],
-                current_cycle=run['current_cycle'],
-                total_cycles=run['total_cycles'],
-                articles_processed=run['articles_processed'],
-                error_message=run['error_message'],
-                created_at=run['created_at'],
-                updated_at=run['updated_at'],
-                started_at=run['started_at'],
-                ended_at=run['ended_at'],
-                duration_minutes=run['duration_minutes']
-            )
-            for run in runs
-        ]
+        # Bound once rather than looked up as a global attribute per row
+        validate = PipelineRunResponse.model_validate
+        return [validate(dict(run)) for run in runs]
 
-@app.get("/admin/articles", response_model=list[ArticleResponse])
+# Off admin_router: iter_articles reads through a connection of its own, so a
+# db_scope one would sit idle for the whole stream
+@app.get(
+    "/admin/articles",
+    response_model=list[ArticleResponse],
+    dependencies=[Depends(get_current_admin_user)]
+)
 async def get_articles_endpoint(
     limit: int = 50,
-    pipeline_id: str = None,
-    current_admin: User = Depends(get_current_admin_user)
+    pipeline_id: str = None
 ):
     """Get processed articles. (Admin only)"""
-    articles = await get_articles(limit, pipeline_id)
-    
-    return [
-        ArticleResponse(
-            id=article['id'],
-            original_title=article['original_title'],
-            original_link=article['original_link'],
-            image_url=article.get('image_url'),
-            generated_content=article['generated_content'],
-            authenticity_score=json.loads(article['authenticity_score']) if article['authenticity_score'] else {},
-            source=article['source'],
-            processed_at=article['processed_at'],
-            created_at=article['created_at'],
-            pipeline_id=article['pipeline_id'],
-            cycle_number=article['cycle_number']
+    # Rows are encoded one at a time as the cursor yields them, so the page never
+    # sits in memory as a whole; response_model only documents the shape
+    try:
+        body = await _start_json_array(iter_articles(limit, pipeline_id), _article_response_item)
+    except Exception as e:
+        print(f"Error in get_articles_endpoint: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error fetching articles: {str(e)}"
         )
-        for article in articles
-    ]
+    return StreamingResponse(body, media_type="application/json")
 
-@app.get("/admin/dashboard/stats", response_model=AdminDashboardStats)
-async def get_dashboard_stats_endpoint(current_admin: User = Depends(get_current_admin_user)):
+@admin_router.get("/dashboard/stats", response_model=AdminDashboardStats)
+async def get_dashboard_stats_endpoint():
     """Get dashboard statistics. (Admin only)"""
     stats = await get_dashboard_stats()
     
@@ -417,16 +479,15 @@ async def get_dashboard_stats_endpoint(current_admin: User = Depends(get_current
         recent_activity={"articles_today": stats["articles_today"], "total_articles": stats["total_articles"]}
     )
 
-@app.get("/admin/protected")
+@admin_router.get("/protected")
 async def admin_protected_route(current_admin: User = Depends(get_current_admin_user)):
     """Protected admin route."""
     return {"message": f"Hello Admin {current_admin.full_name}, welcome to AIC News Agency Admin Panel!"}
 
-@app.get("/admin/pipeline/logs")
+@admin_router.get("/pipeline/logs")
 async def get_pipeline_logs(
     pipeline_id: str = Query(None),
-    limit: int = 100,
-    current_admin: User = Depends(get_current_admin_user)
+    limit: int = 100
 ):
     """Get recent pipeline logs. (Admin only)"""
     async with get_db_connection() as conn:
@@ -435,30 +496,46 @@ async def get_pipeline_logs(
         if pipeline_id:
             query += " WHERE pipeline_id = $1"
             params.append(pipeline_id)
-        query += " ORDER BY created_at DESC LIMIT $2"
         params.append(limit)
+        query += f" ORDER BY created_at DESC LIMIT ${len(params)}"
         logs = await conn.fetch(query, *params)
         return [dict(log) for log in logs]
 
 # User Articles Endpoints
-@app.post("/user/articles", response_model=UserArticlesPageResponse)
+_MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+async def parse_user_article_request(http_request: Request) -> UserArticleRequest:
+    """Parse and validate the body in one pydantic-core pass, without a json.loads dict"""
+    try:
+        return UserArticleRequest.model_validate_json(await http_request.body())
+    except ValidationError as e:
+        # Same "body"-rooted locations FastAPI reports for its own body parsing
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        )
+
+@app.post(
+    "/user/articles",
+    response_model=UserArticlesPageResponse,
+    dependencies=[Depends(db_scope)],
+    # The body is read by parse_user_article_request, so describe it for the docs here
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": UserArticleRequest.model_json_schema()}}
+    }}
+)
 async def get_user_articles_endpoint(
-    request: UserArticleRequest,
+    http_request: Request,
+    request: UserArticleRequest = Depends(parse_user_article_request),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get articles for user based on interests with pagination."""
     
     try:
-        # Validate and process date filters
+        # UserArticleRequest has already made both dates UTC-aware
         date_from = request.date_from
         date_to = request.date_to
         
-        # Convert timezone-naive datetimes to UTC if needed
-        if date_from and date_from.tzinfo is None:
-            date_from = date_from.replace(tzinfo=timezone.utc)
-        if date_to and date_to.tzinfo is None:
-            date_to = date_to.replace(tzinfo=timezone.utc)
-        
         # Validate date range
         if date_from and date_to and date_from > date_to:
             raise HTTPException(
@@ -488,30 +565,7 @@ async def get_user_articles_endpoint(
             tags = []
             
             # Try to parse the generated content for better formatting
-            try:
-                if generated_content and "HEADLINE:" in generated_content:
-                    lines = generated_content.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith("HEADLINE:"):
-                            title = line.replace("HEADLINE:", "").strip()
-                        elif line.startswith("TAGS:"):
-                            tags_str = line.replace("TAGS:", "").strip()
-                            tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
-
-            except Exception:
-                pass
-            
-            # Calculate relevance score if interests provided
-            relevance_score = None
-            if request.interests:
-                relevance_score = 0.0
-                content_lower = (title + " " + content).lower()
-                matches = 0
-                for interest in request.interests:
-                    if interest.lower() in content_lower:
-                        matches += 1
-                relevance_score = matches / len(request.interests) if request.interests else 0.0
+            title, tags = _parse_generated_content(generated_content, title)
             
             # Ensure datetime is timezone-aware
             published_at = article.get("created_at")
@@ -524,11 +578,13 @@ async def get_user_articles_endpoint(
             
             if article.get("blockchain_stored"):
                 blockchain_stored_count += 1
-                blockchain_info = BlockchainInfo(
-                    stored_on_chain=article.get("blockchain_stored", False),
+                # Hashes and ids come straight from our own columns, so skip
+                # re-validating the hex strings for every article on the page
+                blockchain_info = BlockchainInfo.model_construct(
+                    stored_on_chain=True,
                     transaction_hash=blockchain_transaction_hash,
                     blockchain_article_id=article.get("blockchain_article_id"),
-                    network=article.get("blockchain_network", "bsc_testnet"),
+                    network=article.get("blockchain_network") or "bsc_testnet",
                     explorer_url=article.get("blockchain_explorer_url"),
                     content_hash=article.get("content_hash"),
                     metadata_hash=article.get("metadata_hash")
@@ -539,42 +595,38 @@ async def get_user_articles_endpoint(
                 title=title or "Untitled",
                 content=content,
                 image_url=article.get("image_url"),
-                source=article.get("source", "Unknown"),
+                source=sys.intern(article.get("source") or "Unknown"),
                 published_at=published_at,
-                relevance_score=relevance_score,
+                # Ranked by Postgres when interests are given, absent otherwise
+                relevance_score=article.get("relevance_score"),
                 tags=tags,
                 blockchain_info=blockchain_info,
                 blockchain_transaction_hash=blockchain_transaction_hash  # Added this
             ))
         
-        # Sort by relevance if interests provided
-        if request.interests and user_articles:
-            user_articles.sort(key=lambda x: x.relevance_score or 0, reverse=True)
-        
-        # Calculate pagination info
-        total_pages = math.ceil(result["total_count"] / request.page_size) if result["total_count"] > 0 else 0
-        has_next = request.page < total_pages
-        has_previous = request.page > 1
-        
         # Blockchain statistics
-        blockchain_stats = {
-            "total_articles_on_page": len(user_articles),
-            "blockchain_stored_count": blockchain_stored_count,
-            "blockchain_stored_percentage": (blockchain_stored_count / len(user_articles) * 100) if user_articles else 0,
-            "network": "bsc_testnet",
-            "explorer_base_url": "https://testnet.bscscan.com"
-        }
+        blockchain_stats = BlockchainStatistics(
+            total_articles_on_page=len(user_articles),
+            blockchain_stored_count=blockchain_stored_count,
+            blockchain_stored_percentage=(blockchain_stored_count / len(user_articles) * 100) if user_articles else 0,
+            network="bsc_testnet",
+            explorer_base_url="https://testnet.bscscan.com"
+        )
         
-        return UserArticlesPageResponse(
-            articles=user_articles,
+        page_fields = dict(
             total_count=result["total_count"],
             page=request.page,
             page_size=request.page_size,
-            total_pages=total_pages,
-            has_next=has_next,
-            has_previous=has_previous,
             blockchain_statistics=blockchain_stats
         )
+        # Binary clients opt in through Accept; everyone else gets JSON
+        if _MSGPACK_MEDIA_TYPE in http_request.headers.get("accept", ""):
+            return Response(
+                content=UserArticlesPageResponse.build_msgpack(user_articles, **page_fields),
+                media_type=_MSGPACK_MEDIA_TYPE
+            )
+        page_json = UserArticlesPageResponse.build_json(user_articles, **page_fields)
+        return Response(content=page_json, media_type="application/json")
     
     except HTTPException:
         raise
@@ -585,7 +637,7 @@ async def get_user_articles_endpoint(
             detail=f"Error fetching articles: {str(e)}"
         )
 
-@app.get("/user/articles/search")
+@app.get("/user/articles/search", response_model=ArticleSearchResponse, dependencies=[Depends(db_scope)])
 async def search_user_articles(
     q: str = Query(..., description="Search query", min_length=2),
     limit: int = Query(20, le=100, ge=1, description="Maximum number of articles to return"),
@@ -595,7 +647,7 @@ async def search_user_articles(
     
     try:
         # Split search query into keywords and filter valid ones
-        keywords = [keyword.strip() for keyword in q.split() if len(keyword.strip()) >= 2]
+        keywords = [sys.intern(keyword) for keyword in q.split() if len(keyword) >= 2]
         
         if not keywords:
             raise HTTPException(
@@ -616,18 +668,7 @@ async def search_user_articles(
             tags = []
             
             # Try to parse the generated content for better formatting
-            try:
-                if generated_content and "HEADLINE:" in generated_content:
-                    lines = generated_content.split('\n')
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith("HEADLINE:"):
-                            title = line.replace("HEADLINE:", "").strip()
-                        elif line.startswith("TAGS:"):
-                            tags_str = line.replace("TAGS:", "").strip()
-                            tags = [tag.strip() for tag in tags_str.split(',') if tag.strip()]
-            except Exception:
-                pass
+            title, tags = _parse_generated_content(generated_content, title)
             
             # Ensure datetime is timezone-aware
             published_at = article.get("created_at")
@@ -642,19 +683,19 @@ async def search_user_articles(
                 title=title or "Untitled",
                 content=content,
                 image_url=article.get("image_url"),
-                source=article.get("source", "Unknown"),
+                source=sys.intern(article.get("source") or "Unknown"),
                 published_at=published_at,
                 relevance_score=article.get("relevance_score", 0.0),
                 tags=tags,
                 blockchain_transaction_hash=blockchain_transaction_hash  # Added this
             ))
         
-        return {
-            "articles": search_results,
-            "total_found": len(search_results),
-            "search_query": q,
-            "keywords_used": keywords
-        }
+        return ArticleSearchResponse(
+            articles=search_results,
+            total_found=len(search_results),
+            search_query=q,
+            keywords_used=keywords
+        ).to_response()
     
     except HTTPException:
         raise
@@ -665,72 +706,62 @@ async def search_user_articles(
             detail=f"Error searching articles: {str(e)}"
         )
 
-@app.get("/user/articles/interests")
+@app.get("/user/articles/interests", response_model=PopularInterestsResponse, dependencies=[Depends(db_scope)])
 async def get_popular_interests(current_user: User = Depends(get_current_active_user)):
     """Get popular interests/tags from articles to help users choose."""
+    cached = _interests_cache.get("interests")
+    if cached is None:
+        async with _interests_lock:
+            cached = _interests_cache.get("interests")
+            if cached is None:
+                cached = await _compute_popular_interests()
+                if cached.total_articles_analyzed:
+                    _interests_cache["interests"] = cached
+    return cached.to_response()
+
+async def _compute_popular_interests():
+    """Build the interests payload; falls back to the defaults if the query fails"""
     try:
-        async with get_db_connection() as conn:
-            # Get recent articles and extract common keywords
-            articles = await conn.fetch("""
-                SELECT generated_content 
-                FROM articles 
-                WHERE created_at >= NOW() - INTERVAL '30 days'
-                ORDER BY created_at DESC 
-                LIMIT 100
-            """)
-            
-            # Extract tags from articles
-            all_tags = []
-            
-            for article in articles:
-                content = article.get("generated_content", "")
-                try:
-                    if "TAGS:" in content:
-                        lines = content.split('\n')
-                        for line in lines:
-                            if line.startswith("TAGS:"):
-                                tags_str = line.replace("TAGS:", "").strip()
-                                tags = [tag.strip().lower() for tag in tags_str.split(',') if tag.strip()]
-                                all_tags.extend(tags)
-                                break
-                except Exception:
-                    continue
-            
-            # Count tag frequency
-            from collections import Counter
-            tag_counter = Counter(all_tags)
-            popular_tags = [tag for tag, count in tag_counter.most_common(20) if count > 1]
-            
-            # Add some default popular interests
-            default_interests = [
-                "technology", "politics", "sports", "health", "business", 
-                "science", "entertainment", "world news", "economy", "climate"
-            ]
-            
-            # Combine and deduplicate
-            all_interests = list(set(popular_tags + default_interests))[:30]
-            
-            return {
-                "popular_interests": all_interests,
-                "total_articles_analyzed": len(articles),
-                "suggestion": "Select interests that match your preferences to get personalized article recommendations"
-            }
+        # Tag parsing and counting happen in Postgres; only the top 20 come back
+        popular_tags, articles_analyzed = await get_popular_tags()
+        
+        # Add some default popular interests
+        default_interests = [
+            "technology", "politics", "sports", "health", "business", 
+            "science", "entertainment", "world news", "economy", "climate"
+        ]
+        
+        # Combine and deduplicate
+        all_interests = list(set(popular_tags + default_interests))[:30]
+        
+        return PopularInterestsResponse(
+            popular_interests=all_interests,
+            total_articles_analyzed=articles_analyzed,
+            suggestion="Select interests that match your preferences to get personalized article recommendations"
+        )
     
     except Exception as e:
-        return {
-            "popular_interests": [
+        return PopularInterestsResponse(
+            popular_interests=[
                 "technology", "politics", "sports", "health", "business", 
                 "science", "entertainment", "world news", "economy", "climate"
             ],
-            "total_articles_analyzed": 0,
-            "suggestion": "Select interests that match your preferences to get personalized article recommendations"
-        }
+            total_articles_analyzed=0,
+            suggestion="Select interests that match your preferences to get personalized article recommendations"
+        )
+
+def get_blockchain_hasher():
+    """Return the shared BlockchainHasher, creating it if startup couldn't"""
+    global blockchain_hasher
+    if blockchain_hasher is None:
+        blockchain_hasher = BlockchainHasher()
+    return blockchain_hasher
 
 @app.get("/blockchain/status")
 async def get_blockchain_status():
     """Get blockchain connection status and statistics"""
     try:
-        hasher = BlockchainHasher()
+        hasher = get_blockchain_hasher()
         status = await hasher.check_blockchain_status()
         return {
             "success": True,
@@ -747,7 +778,7 @@ async def get_blockchain_status():
 async def get_blockchain_article(article_id: int):
     """Get article details from blockchain"""
     try:
-        hasher = BlockchainHasher()
+        hasher = get_blockchain_hasher()
         article = await hasher.get_blockchain_article(article_id)
         return {
             "success": True,
@@ -759,6 +790,23 @@ async def get_blockchain_article(article_id: int):
             "error": str(e)
         }
 
+app.include_router(admin_router)
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # asyncpg's I/O path is much cheaper on libuv's event loop than on stdlib asyncio,
+    # and httptools parses requests in C. Pipeline and websocket state live in this
+    # process, so scale out with WEB_CONCURRENCY only once that state is shared.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        workers=int(os.getenv("WEB_CONCURRENCY", "1")),
+        # Skip the per-request access log line; errors are still printed
+        access_log=False,
+        # RFC 6455 ping/pong control frames replace the old JSON "ping" messages
+        ws_ping_interval=30,
+        ws_ping_timeout=10
+    )
\ No newline at end of file
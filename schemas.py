@@ -1,20 +1,24 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from dataclasses import dataclass
+from pydantic import BaseModel, ConfigDict, StringConstraints
+from typing import Annotated, Optional
 from datetime import datetime
 
+# Signup email check done by pydantic-core's regex engine instead of email-validator
+Email = Annotated[str, StringConstraints(pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$", max_length=254)]
+
 # User schemas
 class UserCreate(BaseModel):
-    email: EmailStr
+    email: Email
     password: str
     full_name: str
 
-class AdminUserCreate(BaseModel):
-    email: EmailStr
-    password: str
-    full_name: str
+class AdminUserCreate(UserCreate):
     is_admin: bool = True
 
 class UserResponse(BaseModel):
+    # Built once per response and never mutated
+    model_config = ConfigDict(from_attributes=True, frozen=True, extra="ignore", populate_by_name=True)
+    
     id: int
     email: str
     full_name: str
@@ -22,7 +26,10 @@ class UserResponse(BaseModel):
     is_admin: bool = False
     created_at: Optional[datetime] = None
 
-class User(BaseModel):
+# Internal only (never returned by the API): built straight from trusted users
+# rows, so a plain dataclass without per-construction validation
+@dataclass(slots=True, frozen=True)
+class User:
     id: int
     email: str
     full_name: str
@@ -33,6 +40,8 @@ class User(BaseModel):
 
 # Authentication schemas
 class Token(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
+    
     access_token: str
     token_type: str
     user_type: str  # "user" or "admin"
@@ -44,9 +53,8 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
-class AdminLoginRequest(BaseModel):
-    email: str
-    password: str
+# Same fields as LoginRequest, so share its schema rather than building a second one
+AdminLoginRequest = LoginRequest
 
 # Admin schemas
 class UserUpdate(BaseModel):
@@ -1,21 +1,33 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+import orjson
+import ormsgpack
+from fastapi import Response
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, computed_field, field_serializer, field_validator
+from typing import Optional, List
 from datetime import datetime, timezone
 
 class UserArticleRequest(BaseModel):
-    interests: Optional[List[str]] = Field(default_factory=list, description="User interests/keywords")
+    # Immutable empty default: no default_factory call when interests are omitted
+    interests: Optional[tuple[str, ...]] = Field(default=(), description="User interests/keywords")
     page: int = Field(default=1, ge=1, description="Page number")
     page_size: int = Field(default=10, ge=1, le=100, description="Articles per page")
     source_filter: Optional[str] = Field(default=None, description="Filter by specific source")
     date_from: Optional[datetime] = Field(default=None, description="Filter articles from this date")
     date_to: Optional[datetime] = Field(default=None, description="Filter articles until this date")
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
+    @field_validator("date_from", "date_to")
+    @classmethod
+    def assume_utc(cls, v: Optional[datetime]) -> Optional[datetime]:
+        """Treat timezone-naive dates as UTC"""
+        if v is not None and v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+        return v
+
+# Response models are built once per response and never mutated
+_RESPONSE_CONFIG = ConfigDict(frozen=True, extra="ignore", populate_by_name=True)
 
 class BlockchainInfo(BaseModel):
+    model_config = _RESPONSE_CONFIG
+    
     stored_on_chain: bool = False
     transaction_hash: Optional[str] = None
     blockchain_article_id: Optional[int] = None
@@ -25,6 +37,8 @@ class BlockchainInfo(BaseModel):
     metadata_hash: Optional[str] = None
 
 class UserArticleResponse(BaseModel):
+    model_config = _RESPONSE_CONFIG
+    
     id: int
     title: str
     content: str
@@ -36,28 +50,107 @@ class UserArticleResponse(BaseModel):
     blockchain_info: Optional[BlockchainInfo] = None
     blockchain_transaction_hash: Optional[str] = None  # Added this field
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat() if v else None
-        }
+    @field_serializer("relevance_score", when_used="json")
+    def round_relevance(self, v: Optional[float]) -> Optional[float]:
+        """ts_rank_cd is a float4 normalized to [0, 1); three places is all it carries"""
+        return None if v is None else round(v, 3)
+
+class BlockchainStatistics(BaseModel):
+    model_config = _RESPONSE_CONFIG
+    
+    total_articles_on_page: int = 0
+    blockchain_stored_count: int = 0
+    blockchain_stored_percentage: float = 0.0
+    network: str = "bsc_testnet"
+    explorer_base_url: Optional[str] = None
+
+class _DirectResponseModel(BaseModel):
+    def to_response(self) -> Response:
+        """Serialize once in pydantic-core, skipping FastAPI's response encoding"""
+        return Response(content=self.model_dump_json(), media_type="application/json")
+
+# Built once; serializes a page of articles straight to JSON bytes
+_ARTICLES_ADAPTER = TypeAdapter(List[UserArticleResponse])
+
+def _dump_model(value):
+    """orjson/ormsgpack fallback for the typed models left in a page envelope"""
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError
 
-class UserArticlesPageResponse(BaseModel):
+def _total_pages(total_count: int, page_size: int) -> int:
+    return -(-total_count // page_size)
+
+class UserArticlesPageResponse(_DirectResponseModel):
     articles: List[UserArticleResponse]
     total_count: int
     page: int
     page_size: int
-    total_pages: int
-    has_next: bool
-    has_previous: bool
-    blockchain_statistics: Optional[Dict[str, Any]] = None
+    blockchain_statistics: Optional[BlockchainStatistics] = None
+    
+    # Paging links derive from the three fields above, so they are computed at
+    # serialization time rather than passed in and validated
+    @computed_field
+    @property
+    def total_pages(self) -> int:
+        return _total_pages(self.total_count, self.page_size)
+    
+    @computed_field
+    @property
+    def has_next(self) -> bool:
+        return self.page < self.total_pages
+    
+    @computed_field
+    @property
+    def has_previous(self) -> bool:
+        return self.page > 1
+    
+    @staticmethod
+    def _envelope(total_count: int, page: int, page_size: int,
+                  blockchain_statistics: Optional[BlockchainStatistics]) -> dict:
+        """Page fields after the articles, in the same order model_dump_json writes them"""
+        total_pages = _total_pages(total_count, page_size)
+        return {
+            "total_count": total_count,
+            "page": page,
+            "page_size": page_size,
+            "blockchain_statistics": blockchain_statistics,
+            "total_pages": total_pages,
+            "has_next": page < total_pages,
+            "has_previous": page > 1,
+        }
+    
+    @classmethod
+    def build_json(cls, articles: List[UserArticleResponse], total_count: int, page: int, page_size: int,
+                   blockchain_statistics: Optional[BlockchainStatistics] = None) -> bytes:
+        """Page JSON without building the page model: articles via the shared
+        adapter, the remaining (trusted) fields via orjson"""
+        rest = orjson.dumps(cls._envelope(total_count, page, page_size, blockchain_statistics), default=_dump_model)
+        return b'{"articles":' + _ARTICLES_ADAPTER.dump_json(articles) + b"," + rest[1:]
+    
+    @classmethod
+    def build_msgpack(cls, articles: List[UserArticleResponse], total_count: int, page: int, page_size: int,
+                      blockchain_statistics: Optional[BlockchainStatistics] = None) -> bytes:
+        """Same page as build_json, packed as MessagePack for clients that accept it"""
+        page_dict = {
+            "articles": _ARTICLES_ADAPTER.dump_python(articles),
+            **cls._envelope(total_count, page, page_size, blockchain_statistics)
+        }
+        return ormsgpack.packb(page_dict, default=_dump_model, option=ormsgpack.OPT_NAIVE_UTC)
 
-class ArticleSearchResponse(BaseModel):
+class ArticleSearchResponse(_DirectResponseModel):
     articles: List[UserArticleResponse]
     total_found: int
     search_query: str
     keywords_used: List[str]
 
-class PopularInterestsResponse(BaseModel):
+class PopularInterestsResponse(_DirectResponseModel):
     popular_interests: List[str]
     total_articles_analyzed: int
-    suggestion: str
\ No newline at end of file
+    suggestion: str
+
+# Make sure no schema is left to build lazily on the first request; models that
+# are already complete return immediately
+for _model in (UserArticleRequest, BlockchainInfo, UserArticleResponse, BlockchainStatistics, UserArticlesPageResponse,
+               ArticleSearchResponse, PopularInterestsResponse):
+    _model.model_rebuild()